@@ -0,0 +1,161 @@
+"""Shortest paths through many same-size mazes at once, for making reference answers over large corpora.
+
+The grids are stacked into one (N, H, W) volume, padded with a border of walls and given one flat index space, so a
+single breadth-first wavefront can move through every maze together: each step finds the open, unreached neighbors of
+the whole wavefront with a handful of numpy operations, whatever the number of mazes.  The search leaves a volume of
+distances from each maze's start, and every path is then walked back from its goal, again all mazes at once, by
+stepping to a neighbor one move closer to the start.
+
+The wavefront is kept as an array of flat indices rather than as a mask of the whole volume.  Shifting a full mask
+costs time for every cell of every maze at every step, while a maze's wavefront is usually only a few cells wide, so
+on 51x51 to 501x501 mazes the masks were 7 to 17 times slower.
+"""
+
+
+import numpy as np
+from maze import MOVES, REVERSE_MOVES, Maze, get_flat_offsets
+
+
+#
+# CONSTANTS
+#
+DEFAULT_BATCH_CELLS = 2**24     # Cells of stacked grids searched together by get_directions_batch()
+_MOVE_CHARACTERS = np.frombuffer("".join(MOVES).encode("ascii"), dtype=np.uint8)     # ASCII code of each move number
+_REVERSE_MOVE_NUMBERS = np.array([MOVES.index(REVERSE_MOVES[move]) for move in MOVES])  # Move that undoes each one
+
+
+#
+# HELPER FUNCTIONS
+#
+def stack_grids(mazes) -> np.ndarray:
+    """Return the grids of mazes, a list of same-size Maze objects, as one (N, H, W) uint8 array."""
+    # Handle errors
+    # mazes empty
+    if len(mazes) == 0:
+        raise ValueError("mazes must not be empty")
+    # mazes contains something other than a Maze
+    if not all(isinstance(maze, Maze) for maze in mazes):
+        raise TypeError("mazes must only contain Maze objects")
+    # mazes of different sizes
+    if len({np.shape(maze.grid) for maze in mazes}) != 1:
+        raise ValueError("all mazes must be the same size")
+
+    return np.stack([np.asarray(maze.grid, dtype=np.uint8) for maze in mazes])
+
+
+def get_distance_volumes(grids: np.ndarray, goals: np.ndarray = None) -> np.ndarray:
+    """Return an int32 array shaped like grids, an (N, H, W) stack of maze grids, holding the number of moves from the
+    start (the bottom-left cell) of each maze to each of its cells.  Walls and unreachable halls hold -1.
+    goals, if given, is an (N, 2) array of the [r, c] goal of each maze.  The search of each maze then stops once its
+    goal is reached, and cells farther from the start than the goal hold -1 too.
+    """
+    # Handle errors
+    # grids not 3-dimensional
+    if np.ndim(grids) != 3:
+        raise ValueError("grids must be an (N, H, W) array")
+    # goals of the wrong shape
+    if goals is not None and np.shape(goals) != (len(grids), 2):
+        raise ValueError("goals must be an (N, 2) array")
+
+    (is_open, distances) = _search(np.asarray(grids), goals)
+    return distances.reshape(is_open.shape)[:, 1:-1, 1:-1].copy()
+
+
+def get_directions_batch(mazes, batch_cells: int = DEFAULT_BATCH_CELLS) -> list:
+    """Return a shortest list of 'u'/'d'/'l'/'r' directions from the start to the goal of each maze in mazes, a list of
+    Maze objects, or None for a maze whose goal can't be reached.  The paths are as short as those of
+    reference_pathfinder.get_directions(), but where there are several shortest paths, they may take a different one.
+    Mazes of the same size are searched together, batch_cells cells at a time, so the memory needed stays bounded
+    however many mazes there are.
+    """
+    # Handle errors
+    # mazes contains something other than a Maze
+    if not all(isinstance(maze, Maze) for maze in mazes):
+        raise TypeError("mazes must only contain Maze objects")
+    # batch_cells not a positive int
+    if not isinstance(batch_cells, int) or batch_cells < 1:
+        raise ValueError("batch_cells must be a positive int")
+
+    # Group the mazes by size, and search each group in batches.
+    indices_by_shape = {}
+    for (ii, maze) in enumerate(mazes):
+        indices_by_shape.setdefault(np.shape(maze.grid), []).append(ii)
+    all_directions = [None] * len(mazes)
+    for ((rows, cols), indices) in indices_by_shape.items():
+        batch_size = max(1, batch_cells // ((rows + 2) * (cols + 2)))
+        for batch_start in range(0, len(indices), batch_size):
+            batch = [mazes[ii] for ii in indices[batch_start:batch_start + batch_size]]
+            goals = np.array([maze.winning_position for maze in batch], dtype=np.int64)
+            for (ii, directions) in zip(indices[batch_start:batch_start + batch_size],
+                                        _get_batch_directions(stack_grids(batch), goals)):
+                all_directions[ii] = directions
+    return all_directions
+
+
+def _search(grids: np.ndarray, goals: np.ndarray = None) -> tuple:
+    """Run the breadth-first wavefront from the start of every maze in grids, as described in get_distance_volumes().
+    Returns (is_open, distances): the padded (N, H + 2, W + 2) boolean array of open cells, and the flat int32 distances
+    over the same volume.
+    """
+    (count, rows, cols) = np.shape(grids)
+    (padded_rows, padded_width) = (rows + 2, cols + 2)
+    is_open = np.zeros((count, padded_rows, padded_width), dtype=np.bool_)
+    is_open[:, 1:-1, 1:-1] = grids != 1
+    flat_is_open = is_open.ravel()
+    distances = np.full(len(flat_is_open), -1, dtype=np.int32)
+    offsets = np.array(get_flat_offsets(padded_width))
+    bases = np.arange(count, dtype=np.int64) * (padded_rows * padded_width)     # Flat index of each maze's (-1, -1)
+    claims = np.zeros(len(flat_is_open), dtype=np.int64)    # Scratch space for removing repeated cells
+
+    wavefront = bases + rows * padded_width + 1
+    wavefront = wavefront[flat_is_open[wavefront]]
+    distances[wavefront] = 0
+    if goals is not None:
+        goal_indices = bases + (goals[:, 0] + 1) * padded_width + goals[:, 1] + 1
+        is_searching = np.ones(count, dtype=np.bool_)
+    distance = 0
+    while len(wavefront) > 0:
+        distance += 1
+        neighbors = (wavefront[:, np.newaxis] + offsets).ravel()
+        neighbors = neighbors[flat_is_open[neighbors]]
+        neighbors = neighbors[distances[neighbors] < 0]
+        # A cell can be next to more than one cell of the wavefront.  Keep one copy of each: the one whose position
+        # is written last into claims.
+        positions = np.arange(len(neighbors))
+        claims[neighbors] = positions
+        neighbors = neighbors[claims[neighbors] == positions]
+        distances[neighbors] = distance
+        wavefront = neighbors
+        if goals is not None:
+            # Stop searching the mazes whose goals have been reached.
+            is_searching &= distances[goal_indices] < 0
+            wavefront = wavefront[is_searching[wavefront // (padded_rows * padded_width)]]
+    return is_open, distances
+
+
+def _get_batch_directions(grids: np.ndarray, goals: np.ndarray) -> list:
+    """Return the direction lists described in get_directions_batch() for the stacked grids, whose goals are in
+    goals, an (N, 2) array.
+    """
+    (count, rows, cols) = np.shape(grids)
+    (is_open, distances) = _search(grids, goals)
+    padded_width = cols + 2
+    offsets = np.array(get_flat_offsets(padded_width))
+    bases = np.arange(count, dtype=np.int64) * is_open[0].size
+    positions = bases + (goals[:, 0] + 1) * padded_width + goals[:, 1] + 1
+    lengths = distances[positions]
+
+    # Walk back from every goal at once.  At each step, move to the first neighbor, in the order of MOVES, that is one
+    # move closer to the start, and record the move that leads from there, filling each path in from its end.
+    moves = np.zeros((count, max(0, int(lengths.max()))), dtype=np.uint8)
+    remaining = lengths.astype(np.int64)
+    active = np.flatnonzero(remaining > 0)
+    while len(active) > 0:
+        neighbors = positions[active, np.newaxis] + offsets
+        move_numbers = np.argmax(distances[neighbors] == (remaining[active] - 1)[:, np.newaxis], axis=1)
+        positions[active] = neighbors[np.arange(len(active)), move_numbers]
+        remaining[active] -= 1
+        moves[active, remaining[active]] = _MOVE_CHARACTERS[_REVERSE_MOVE_NUMBERS[move_numbers]]
+        active = active[remaining[active] > 0]
+
+    return [list(moves[ii, :lengths[ii]].tobytes().decode("ascii")) if lengths[ii] >= 0 else None for ii in range(count)]
@@ -0,0 +1,206 @@
+"""Benchmarks for the hot paths of the project: maze generation with each algorithm, the priority queue, the example
+solver, and the plotter's drawing preparation.
+
+Run this file to time each benchmark over a sweep of maze sizes and seeds.  Results are printed, and can be written
+to a JSON file with --output.  With --baseline, results are compared against a JSON file written earlier, and any
+benchmark whose best time grew by more than --tolerance is flagged as a regression.  The best time is the median over
+the seeds of the fastest of each seed's repeats, since a single run can be slowed down by anything else on the machine.
+"""
+
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+import batch_solver
+import example_solution_pathfinder
+from maze import Maze, generate_mazes
+from util import MinPriorityQueue
+
+
+#
+# CONSTANTS
+#
+DEFAULT_SIZES = [20, 50, 100]
+DEFAULT_SEEDS = [0, 1, 2, 3, 4]
+DEFAULT_REPEATS = 5
+DEFAULT_TOLERANCE = 0.25    # A best time more than 25% slower than the baseline's is a regression
+DEFAULT_BASELINE = "benchmark_baseline.json"
+BATCH_SOLVER_MAZES = 100    # Mazes solved together by the batch_solver benchmark
+
+
+#
+# BENCHMARKS
+# Each benchmark takes a maze size and a seed, does any setup that shouldn't be timed, and returns a function of no
+# arguments that runs the code being measured.
+#
+def _maze_construction(size: int, seed: int):
+    return lambda: Maze(size, size, seed=seed)
+
+
+def _maze_construction_kruskal(size: int, seed: int):
+    return lambda: Maze(size, size, seed=seed, algorithm="kruskal")
+
+
+def _maze_construction_backtracker(size: int, seed: int):
+    return lambda: Maze(size, size, seed=seed, algorithm="backtracker")
+
+
+def _priority_queue(size: int, seed: int):
+    rng = random.Random(seed)
+    priorities = [rng.randrange(4 * size) for _ in range(size * size)]  # As many entries as the maze has cells
+
+    def run():
+        queue = MinPriorityQueue()
+        for (ii, priority) in enumerate(priorities):
+            queue.enqueue(ii, priority)
+        while len(queue) > 0:
+            queue.dequeue()
+    return run
+
+
+def _example_solver(size: int, seed: int):
+    maze = Maze(size, size, seed=seed)
+    return lambda: example_solution_pathfinder.get_directions(maze)
+
+
+def _batch_solver(size: int, seed: int):
+    mazes = list(generate_mazes(BATCH_SOLVER_MAZES, size=size, base_seed=seed, workers=1))
+    return lambda: batch_solver.get_directions_batch(mazes)
+
+
+def _plotter_preparation(size: int, seed: int):
+    import plotter     # Imported here so that the other benchmarks still run where the plotter can't be imported
+    maze = Maze(size, size, seed=seed)
+    directions = example_solution_pathfinder.get_directions(maze)
+    return lambda: plotter.prepare_drawing(maze, directions)
+
+
+BENCHMARKS = {
+    "maze_construction": _maze_construction,
+    "maze_construction_kruskal": _maze_construction_kruskal,
+    "maze_construction_backtracker": _maze_construction_backtracker,
+    "priority_queue": _priority_queue,
+    "example_solver": _example_solver,
+    "batch_solver": _batch_solver,
+    "plotter_preparation": _plotter_preparation,
+}
+
+
+#
+# HELPER FUNCTIONS
+#
+def run_benchmarks(sizes: list, seeds: list, repeats: int, names: list = None) -> dict:
+    """Run the benchmarks called names (or all of them) for every size and seed, and return a dict mapping
+    "name/size" to a dict of statistics.  Each seed is timed repeats times, and its peak memory is measured in one
+    more, separate run, since tracemalloc slows the code down.
+    The repeats are taken in rounds over the whole sweep, rather than back to back, so that a few seconds in which the
+    machine is busy with something else only slow down one of each seed's repeats, and not its fastest.
+    A benchmark that can't be set up (for example because a module can't be imported here) is recorded as skipped.
+    Errors raised by the code being measured are not caught.
+    """
+    results = {}
+    runs = {}   # Maps "name/size" to a list of the functions to time, one per seed
+    for name in (names or list(BENCHMARKS)):
+        for size in sizes:
+            key = f"{name}/{size}"
+            try:
+                runs[key] = [BENCHMARKS[name](size, seed) for seed in seeds]
+            except (ImportError, AttributeError, OSError) as error:
+                results[key] = {"skipped": f"{type(error).__name__}: {error}"}
+                print(f"{key:36s} skipped ({type(error).__name__}: {error})")
+
+    times = {key: [[] for _ in key_runs] for (key, key_runs) in runs.items()}  # Times of each seed of each benchmark
+    for _ in range(repeats):
+        for (key, key_runs) in runs.items():
+            for (run, seed_times) in zip(key_runs, times[key]):
+                start_time = time.perf_counter()
+                run()
+                seed_times.append(time.perf_counter() - start_time)
+
+    for (key, key_runs) in runs.items():
+        peak_bytes = 0
+        for run in key_runs:
+            tracemalloc.start()
+            try:
+                run()
+                peak_bytes = max(peak_bytes, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        all_times = [seed_time for seed_times in times[key] for seed_time in seed_times]
+        results[key] = {
+            "best_s": float(np.median([min(seed_times) for seed_times in times[key]])),
+            "median_s": float(np.median(all_times)),
+            "p95_s": float(np.percentile(all_times, 95)),
+            "peak_bytes": peak_bytes,
+            "samples": len(all_times),
+        }
+        print(f"{key:36s} best {results[key]['best_s']*1000:10.3f} ms   median {results[key]['median_s']*1000:10.3f} ms   p95 {results[key]['p95_s']*1000:10.3f} ms   peak {peak_bytes/2**20:8.2f} MiB")
+    return results
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return a list of messages, one for each benchmark in both results and baseline whose best time is more than
+    (1 + tolerance) times the baseline's.  Baselines written before best times were recorded are compared by median.
+    """
+    regressions = []
+    for (key, stats) in results.items():
+        baseline_stats = baseline.get(key)
+        if baseline_stats is None:
+            continue
+        statistic = "best_s" if "best_s" in baseline_stats else "median_s"
+        if statistic not in stats:
+            continue
+        ratio = stats[statistic] / baseline_stats[statistic]
+        if ratio > 1 + tolerance:
+            regressions.append(f"{key}: {statistic[:-2]} {stats[statistic]*1000:.3f} ms is {ratio:.2f}x the baseline's {baseline_stats[statistic]*1000:.3f} ms")
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    """Run the benchmarks from the command line.  Returns 1 if a regression was found, else 0."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="maze side lengths to run")
+    parser.add_argument("--seeds", type=int, nargs="+", default=DEFAULT_SEEDS, help="maze seeds to run")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="timed runs per seed")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help=f"compare against this JSON file, such as {DEFAULT_BASELINE}")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown before a regression is flagged")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.seeds, args.repeats, args.only)
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "sizes": args.sizes,
+        "seeds": args.seeds,
+        "repeats": args.repeats,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+#
+# MAIN SCRIPT
+#
+if __name__ == "__main__":
+    sys.exit(main())
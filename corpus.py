@@ -0,0 +1,129 @@
+"""Compact on-disk storage for large collections of mazes.
+
+A corpus file holds, in order:
+    a 32-byte header:   magic b"MAZECRP\0", format version (uint32), reserved (uint32), maze count (uint64),
+                        and the byte offset of the index (uint64)
+    the maze data:      for each maze, its walls as a bit-packed, row-major array of rows * cols bits (1 = wall)
+    the index:          one INDEX_DTYPE record per maze, giving its data offset, size and goal position
+
+The start is always the bottom-left cell and the goal is stored in the index, so one bit per cell is enough to rebuild
+the full 0/1/2/3 grid.  All integers are little-endian.
+"""
+
+
+import numpy as np
+from maze import Maze
+
+
+#
+# CONSTANTS
+#
+MAGIC = b"MAZECRP\0"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("reserved", "<u4"), ("count", "<u8"),
+                         ("index_offset", "<u8")])
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("rows", "<u4"), ("cols", "<u4"), ("goal_r", "<u4"), ("goal_c", "<u4")])
+
+
+#
+# CLASSES
+#
+class MazeCorpus:
+    """Read-only view of a corpus file.  The file is memory-mapped, so opening it reads only the header, and each maze
+    is unpacked only when it is asked for.
+    """
+
+    def __init__(self, path):
+        """path is the path to a corpus file written by write_corpus()."""
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+
+        # Handle errors
+        # file too short to have a header
+        if len(self._data) < HEADER_DTYPE.itemsize:
+            raise ValueError(f"{path} is not a maze corpus file")
+        header = self._data[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        # wrong magic
+        if header["magic"] != MAGIC.rstrip(b"\0"):
+            raise ValueError(f"{path} is not a maze corpus file")
+        # unsupported version
+        if header["version"] != VERSION:
+            raise ValueError(f"{path} has unsupported corpus format version {header['version']}")
+
+        index_offset = int(header["index_offset"])
+        index_end = index_offset + int(header["count"]) * INDEX_DTYPE.itemsize
+        # index runs past the end of the file
+        if index_end > len(self._data):
+            raise ValueError(f"{path} is truncated")
+        self.index = self._data[index_offset:index_end].view(INDEX_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, i: int) -> Maze:
+        """Return maze number i as a Maze object."""
+        return Maze.from_grid(self.get_grid(i))
+
+    def __iter__(self):
+        for ii in range(len(self)):
+            yield self[ii]
+
+    def get_grid(self, i: int) -> np.ndarray:
+        """Return the 0/1/2/3 grid of maze number i, without building a Maze object."""
+        # Handle errors
+        # i not int
+        if not isinstance(i, (int, np.integer)):
+            raise TypeError("i must be an int")
+        # i out of bounds
+        if not (-len(self) <= i < len(self)):
+            raise IndexError("maze index out of range")
+
+        record = self.index[i]
+        rows = int(record["rows"])
+        cols = int(record["cols"])
+        offset = int(record["offset"])
+        packed = self._data[offset:offset + _packed_size(rows, cols)]
+        grid = np.unpackbits(packed, count=rows * cols).reshape(rows, cols)
+        grid[record["goal_r"], record["goal_c"]] = 2
+        grid[-1, 0] = 3
+        return grid
+
+    def close(self) -> None:
+        """Release the memory map.  Mazes already returned stay usable."""
+        self.index = None
+        self._data = None
+
+
+#
+# HELPER FUNCTIONS
+#
+def write_corpus(path, mazes) -> int:
+    """Write mazes, an iterable of Maze objects, to a new corpus file at path, and return how many were written.
+    mazes is consumed one at a time, so it may be a generator such as maze.generate_mazes().
+    """
+    index = []
+    with open(path, "wb") as file:
+        file.write(bytes(HEADER_DTYPE.itemsize))    # Placeholder, filled in once the count is known
+        offset = HEADER_DTYPE.itemsize
+        for maze in mazes:
+            # Handle errors
+            # maze not a Maze object
+            if not isinstance(maze, Maze):
+                raise TypeError("mazes must only contain Maze objects")
+
+            (rows, cols) = np.shape(maze.grid)
+            packed = np.packbits(np.asarray(maze.grid == 1).ravel())
+            file.write(packed.tobytes())
+            index.append((offset, rows, cols, maze.winning_position[0], maze.winning_position[1]))
+            offset += len(packed)
+
+        file.write(np.array(index, dtype=INDEX_DTYPE).tobytes())
+        header = np.array([(MAGIC, VERSION, 0, len(index), offset)], dtype=HEADER_DTYPE)
+        file.seek(0)
+        file.write(header.tobytes())
+    return len(index)
+
+
+def _packed_size(rows: int, cols: int) -> int:
+    """Return the number of bytes used by the bit-packed walls of a rows x cols maze."""
+    return (rows * cols + 7) // 8
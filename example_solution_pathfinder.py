@@ -76,7 +76,7 @@ def get_directions(maze) -> list:
     start with underscores.  Also, util.MinPriorityQueue is a useful class for enqueueing the nodes you discover.
     """
     # Get starting position and goal position
-    starting_position = [19, 0]     # r, c
+    starting_position = [len(maze.grid) - 1, 0]     # r, c
     goal_position = maze.winning_position
 
     # Set up a fringe, initially with just the starting point
@@ -85,7 +85,7 @@ def get_directions(maze) -> list:
     fringe.enqueue(initial_state, initial_state.f)
 
     # Keep track of visited states
-    visited_coords = [[19, 0]]    # List of coordinate sublists, each of which is formatted [r, c]
+    visited_coords = [starting_position]    # List of coordinate sublists, each of which is formatted [r, c]
 
     # Run A*
     while True:
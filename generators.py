@@ -0,0 +1,269 @@
+"""Maze generation algorithms, selected by name with Maze(..., algorithm=...).
+
+A generator is a function generator(rows, cols, rng), where rng is a numpy.random.Generator.  It returns a rows x cols
+uint8 array of 0s (halls) and 1s (walls), in which the bottom-left cell is a hall and every hall can be reached from it.
+Maze then puts the goal on the hall farthest from the bottom-left cell, and the start on the bottom-left cell.
+GENERATORS maps each name to its generator, and register_generator() adds new ones.
+
+The Kruskal and recursive backtracker generators carve passages between cells at even columns, and at every second row
+counting up from the bottom, so that the bottom-left cell is always one of them.  Their mazes have no loops.  If rows or
+cols is even, the top row or the right-hand column is left as solid wall.
+
+generate_costs() makes the optional terrain of a maze: the cost of moving into each cell, as a compact uint8 array.
+"""
+
+
+import heapq
+import numpy as np
+
+
+#
+# CONSTANTS
+#
+MAX_COST = 255  # Highest cost a cell can have, so that costs fit in a uint8
+
+
+#
+# GENERATORS
+#
+def generate_prims(rows: int, cols: int, rng) -> np.ndarray:
+    """Grow the maze out from the bottom-left cell with a randomized Prim's Algorithm:
+    https://en.wikipedia.org/wiki/Prim%27s_algorithm
+    A wall next to the maze is turned into a hall unless that would make it touch 3 or more halls, counting diagonals,
+    so the maze can have a few small loops.
+    """
+    # The generator works on flat bytearrays padded with a 1-cell border, so that every cell has 8 neighbors and
+    # neighbor lookups are plain integer offsets.  This is much faster than indexing numpy scalars one at a time.
+    padded_width = cols + 2
+    crosswise_offsets = (-padded_width, padded_width, -1, 1)   # Upper, lower, left, right
+    all_offsets = (-padded_width - 1, -padded_width, -padded_width + 1, -1, 1, padded_width - 1, padded_width, padded_width + 1)
+
+    # Randomly weight each cell.  The border gets no weight, since it is never added to the frontier.
+    weights = np.zeros((rows + 2, cols + 2))
+    weights[1:-1, 1:-1] = rng.random((rows, cols))
+    weights = weights.ravel().tolist()
+
+    # is_hall holds 1s (halls) and 0s (walls and border).  At first, have it all be walls.
+    is_hall = bytearray((rows + 2) * padded_width)
+    # has_been_in_frontier marks cells that must not be pushed onto the frontier (again).  This includes the border.
+    has_been_in_frontier = np.ones((rows + 2, cols + 2), dtype=np.uint8)
+    has_been_in_frontier[1:-1, 1:-1] = 0
+    has_been_in_frontier = bytearray(has_been_in_frontier.tobytes())
+    # Mark the bottom-left spot as a hall.  This will be the starting point.
+    start = rows * padded_width + 1
+    is_hall[start] = 1
+    has_been_in_frontier[start] = 1
+
+    # Generate the rest of the maze.
+    # The frontier is a heap of all walls that neighbor a hall, keyed by weight.  Halls never turn back into walls,
+    # so a wall that is rejected for touching too many halls can never be accepted later, and can be dropped for good.
+    frontier = []
+    for offset in crosswise_offsets:
+        neighbor = start + offset
+        if not has_been_in_frontier[neighbor]:
+            has_been_in_frontier[neighbor] = 1
+            heapq.heappush(frontier, (weights[neighbor], neighbor))
+    while frontier:     # Each cycle of this loop considers exactly one wall cell.
+        # Of the wall cells neighboring a hall cell, take the one with lowest weight.
+        (_, lowest) = heapq.heappop(frontier)
+        # If this wall is adjacent to 3 or more halls in any direction (not just crosswise), leave it as a wall.
+        neighbor_count = 0
+        for offset in all_offsets:
+            neighbor_count += is_hall[lowest + offset]
+        if neighbor_count >= 3:
+            continue
+        # Else turn it into a hall, and add its wall neighbors to the frontier.
+        is_hall[lowest] = 1
+        for offset in crosswise_offsets:
+            neighbor = lowest + offset
+            if not has_been_in_frontier[neighbor]:
+                has_been_in_frontier[neighbor] = 1
+                heapq.heappush(frontier, (weights[neighbor], neighbor))
+        # Once the frontier is empty, the maze is complete!
+
+    # Create an array of 0s (halls) and 1s (walls) from is_hall.
+    halls_and_walls_array = np.frombuffer(is_hall, dtype=np.uint8).reshape(rows + 2, padded_width)[1:-1, 1:-1]
+    return (1 - halls_and_walls_array).astype(np.uint8)
+
+
+def generate_kruskal(rows: int, cols: int, rng) -> np.ndarray:
+    """Join the cells with a randomized Kruskal's Algorithm: https://en.wikipedia.org/wiki/Kruskal%27s_algorithm
+    Each possible passage gets a random weight, and the maze is the minimum spanning tree of the cells.
+    """
+    (cell_rows, cell_cols) = _get_cell_shape(rows, cols)
+    cells = np.arange(cell_rows * cell_cols).reshape(cell_rows, cell_cols)
+    passage_count = cell_rows * (cell_cols - 1) + (cell_rows - 1) * cell_cols
+
+    # Every possible passage, listed from lightest to heaviest.  The first cell_rows * (cell_cols - 1) passages, before
+    # shuffling, are the ones between side-by-side cells.
+    order = rng.permutation(passage_count)
+    a = np.concatenate([cells[:, :-1].ravel(), cells[:-1, :].ravel()])[order]
+    b = np.concatenate([cells[:, 1:].ravel(), cells[1:, :].ravel()])[order]
+    is_open = np.zeros(passage_count, dtype=np.bool_)
+    is_open[order[_minimum_spanning_tree(a, b, cell_rows * cell_cols)]] = True
+
+    return _carve_passages(rows, cols, is_open[:cell_rows * (cell_cols - 1)].reshape(cell_rows, cell_cols - 1),
+                           is_open[cell_rows * (cell_cols - 1):].reshape(cell_rows - 1, cell_cols))
+
+
+def generate_backtracker(rows: int, cols: int, rng) -> np.ndarray:
+    """Carve the maze with a randomized depth-first search from the bottom-left cell, the recursive backtracker:
+    https://en.wikipedia.org/wiki/Maze_generation_algorithm#Randomized_depth-first_search
+    The search keeps its own stack, so it works for mazes of any size without hitting Python's recursion limit.
+    """
+    (cell_rows, cell_cols) = _get_cell_shape(rows, cols)
+
+    # Work on flat bytearrays of the cells, padded with a border that counts as already visited.
+    padded_width = cell_cols + 2
+    is_visited = np.ones((cell_rows + 2, padded_width), dtype=np.uint8)
+    is_visited[1:-1, 1:-1] = 0
+    is_visited = bytearray(is_visited.tobytes())
+    is_right_open = bytearray(len(is_visited))  # 1 where the passage from a cell to the cell to its right is open
+    is_down_open = bytearray(len(is_visited))   # 1 where the passage from a cell to the cell below it is open
+    draws = rng.random(cell_rows * cell_cols).tolist()  # One for each cell visited after the first
+    draw_count = 0
+
+    start = cell_rows * padded_width + 1
+    is_visited[start] = 1
+    stack = [start]
+    while stack:
+        cell = stack[-1]
+        unvisited = [neighbor for neighbor in (cell - padded_width, cell + padded_width, cell - 1, cell + 1)
+                     if not is_visited[neighbor]]
+        if not unvisited:
+            stack.pop()
+            continue
+        neighbor = unvisited[int(draws[draw_count] * len(unvisited))]
+        draw_count += 1
+        is_visited[neighbor] = 1
+        if neighbor == cell + 1:
+            is_right_open[cell] = 1
+        elif neighbor == cell - 1:
+            is_right_open[neighbor] = 1
+        elif neighbor == cell + padded_width:
+            is_down_open[cell] = 1
+        else:
+            is_down_open[neighbor] = 1
+        stack.append(neighbor)
+
+    is_right_open = np.frombuffer(is_right_open, dtype=np.uint8).reshape(cell_rows + 2, padded_width)
+    is_down_open = np.frombuffer(is_down_open, dtype=np.uint8).reshape(cell_rows + 2, padded_width)
+    return _carve_passages(rows, cols, is_right_open[1:-1, 1:-2] != 0, is_down_open[1:-2, 1:-1] != 0)
+
+
+GENERATORS = {
+    "prims": generate_prims,
+    "kruskal": generate_kruskal,
+    "backtracker": generate_backtracker,
+}
+
+
+#
+# HELPER FUNCTIONS
+#
+def register_generator(name: str, generator) -> None:
+    """Make generator available as Maze(..., algorithm=name).  generator must follow the contract at the top of this
+    module.
+    """
+    # Handle errors
+    # name not a string
+    if not isinstance(name, str):
+        raise TypeError("name must be a string")
+    # name already taken
+    if name in GENERATORS:
+        raise ValueError(f"there is already a generator called {name!r}")
+    # generator not callable
+    if not callable(generator):
+        raise TypeError("generator must be callable")
+    GENERATORS[name] = generator
+
+
+def generate_costs(rows: int, cols: int, max_cost: int, rng) -> np.ndarray:
+    """Return a rows x cols uint8 array of costs of moving into each cell, drawn uniformly from 1 to max_cost.  Walls
+    get costs too, which only matter if they are later turned into halls.
+    rng is a numpy.random.Generator.
+    """
+    return rng.integers(1, max_cost, size=(rows, cols), dtype=np.uint8, endpoint=True)
+
+
+def spanning_forest(a: np.ndarray, b: np.ndarray, node_count: int) -> tuple:
+    """Choose which of the edges (a[i], b[i]) between nodes 0 to node_count - 1 to keep, so that the kept edges join
+    the same nodes as all of them, but without any loops.  Returns (is_kept, roots): a bool array over the edges, and
+    an array mapping each node to the smallest node joined to it.
+    Each round, every group with an edge to a group with a smaller root hooks onto one such group, until no edges are
+    left between groups.  Each group hooks onto a strictly smaller root, so the hooks can't form a loop.
+    """
+    roots = np.arange(node_count)
+    is_kept = np.zeros(len(a), dtype=np.bool_)
+    while True:
+        (root_a, root_b) = (roots[a], roots[b])
+        is_between = np.flatnonzero(root_a != root_b)
+        if len(is_between) == 0:
+            return is_kept, roots
+        upper = np.maximum(root_a[is_between], root_b[is_between])
+        lower = np.minimum(root_a[is_between], root_b[is_between])
+        (upper, first) = np.unique(upper, return_index=True)
+        roots[upper] = lower[first]
+        is_kept[is_between[first]] = True
+        roots = _compress_paths(roots)
+
+
+def _minimum_spanning_tree(a: np.ndarray, b: np.ndarray, node_count: int) -> np.ndarray:
+    """Return the indices of the edges (a[i], b[i]) that Kruskal's Algorithm keeps, when edge i is lighter than edge
+    i + 1.  Those are the edges of the minimum spanning forest, which is also what Boruvka's Algorithm finds: in each
+    round every set keeps the lightest edge leaving it.  That way every set takes its step at once, with numpy.
+    The sets are a union-find array, with every path compressed after each round.
+    """
+    roots = np.arange(node_count)
+    live = np.arange(len(a))    # Edges that might still join two sets, lightest first
+    kept = []
+    while True:
+        (root_a, root_b) = (roots[a[live]], roots[b[live]])
+        is_between = root_a != root_b
+        (live, root_a, root_b) = (live[is_between], root_a[is_between], root_b[is_between])
+        if len(live) == 0:
+            return np.concatenate(kept) if kept else np.zeros(0, dtype=np.int64)
+
+        # The lightest edge leaving each set.  Edges are numbered from lightest to heaviest.
+        lightest = np.full(node_count, len(a))
+        np.minimum.at(lightest, root_a, live)
+        np.minimum.at(lightest, root_b, live)
+        chosen = np.unique(lightest[lightest < len(a)])
+        kept.append(chosen)
+
+        # Merge the sets along the chosen edges.  They never form a loop, since they all belong to the tree.
+        (_, set_roots) = spanning_forest(roots[a[chosen]], roots[b[chosen]], node_count)
+        roots = set_roots[roots]
+
+
+def _compress_paths(roots: np.ndarray) -> np.ndarray:
+    """Return roots with every node pointing straight at the root of its tree."""
+    while True:
+        next_roots = roots[roots]
+        if np.array_equal(next_roots, roots):
+            return roots
+        roots = next_roots
+
+
+def _get_cell_shape(rows: int, cols: int) -> tuple:
+    """Return the number of (rows, columns) of cells in a rows x cols grid laid out as described at the top of this
+    module.
+    """
+    # Handle errors
+    # maze too small to have a goal apart from the start
+    if rows < 3 and cols < 3:
+        raise ValueError("rows or cols must be at least 3 for this algorithm")
+    return (rows + 1) // 2, (cols + 1) // 2
+
+
+def _carve_passages(rows: int, cols: int, is_right_open: np.ndarray, is_down_open: np.ndarray) -> np.ndarray:
+    """Return the grid of 0s and 1s for cells laid out as described at the top of this module.
+    is_right_open[i, j] is whether cell (i, j) is joined to cell (i, j + 1), and is_down_open[i, j] whether it is
+    joined to cell (i + 1, j).
+    """
+    top = (rows - 1) % 2   # Row of the top row of cells
+    grid = np.ones((rows, cols), dtype=np.uint8)
+    grid[top::2, 0::2] = 0
+    grid[top::2, 1:2 * is_right_open.shape[1]:2][is_right_open] = 0
+    grid[top + 1::2, 0::2][is_down_open] = 0
+    return grid
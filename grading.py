@@ -0,0 +1,353 @@
+"""Grade many solver modules against a maze corpus in parallel.
+
+Each (solver, maze) pair runs in a pool of worker processes.  A call that runs past its timeout has its worker killed
+and replaced, so one hanging solver can't block the others, and workers can be given a memory limit.  Results are
+written to a JSONL file, one line per (solver, maze) pair, as soon as each one finishes.
+Given a result_cache.ResultCache, pairs whose solver file and maze grid are unchanged since they were last graded are
+answered from the cache instead of being run again.
+
+Run this file to grade from the command line, for example:
+    python grading.py corpus.mzc results.jsonl submissions/*.py --workers 8 --timeout 5 --memory-limit 1024 \
+        --cache-dir .grading_cache
+"""
+
+
+import argparse
+import collections
+import importlib.util
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+import traceback
+import validation
+from corpus import MazeCorpus
+from instrumentation import InstrumentedMaze
+from result_cache import DEFAULT_DISK_BYTES, ResultCache, hash_grid, hash_solver_source, make_key
+
+
+#
+# CONSTANTS
+#
+DEFAULT_TIMEOUT = 10.0  # seconds per call
+SETUP_TIMEOUT = 60.0    # seconds a worker may take to load a maze and a solver before the call starts
+_STARTED = "started"    # Sent by a worker when the solver's call starts, before its result
+EXPANSION_METHODS = ["get_legal_moves", "get_legal_moves_unchecked", "get_neighbors_unchecked", "get_flat_neighbors_unchecked"]
+
+
+#
+# HELPER FUNCTIONS
+#
+def load_solver(path: str):
+    """Import the Python file at path as a module, and return it.  The module must define get_directions(maze)."""
+    module_name = "solver_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    # Handle errors
+    # path not a Python file
+    if spec is None:
+        raise ImportError(f"cannot load a module from {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # module has no get_directions
+    if not callable(getattr(module, "get_directions", None)):
+        raise AttributeError(f"{path} does not define get_directions()")
+    return module
+
+
+def grade(solver_paths: list, corpus_path: str, output_path: str, workers: int = None, timeout: float = DEFAULT_TIMEOUT,
+          memory_limit_mb: int = None, maze_indices: list = None, cache: ResultCache = None) -> int:
+    """Run every solver in solver_paths on every maze in the corpus at corpus_path (or only those in maze_indices),
+    and append one JSON line per (solver, maze) pair to output_path as the results come in.  Returns the number of
+    results written.
+    workers is the number of worker processes, or None for one per CPU.
+    timeout is the most time, in seconds, that a single call may take before its worker is killed.  It is counted from
+    when the worker starts the call, after it has loaded the maze and the solver, which may take up to SETUP_TIMEOUT.
+    memory_limit_mb caps the address space of each worker, where the platform supports it.
+    cache is a ResultCache to answer from and to store "ok" results in, or None to run every pair.
+    Each line holds "solver", "maze", "status" ("ok", "error", "timeout", or "crashed"), "wall_time_s",
+    "expansions" (calls to the EXPANSION_METHODS of the maze), "cells_touched" (distinct cells the solver asked the maze
+    about), the keys of validation.score_directions(), including "error", and "cached" (whether the result came from
+    cache, in which case its times are those of the run that was cached).
+    "expansions" and "cells_touched" only count calls to the maze's methods.  They are None when the solver called none
+    of the methods of InstrumentedMaze, for example because it reads maze.grid or maze.move_masks directly, since then
+    nothing was measured.
+    """
+    # Handle errors
+    # workers not positive
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    # timeout not positive
+    if timeout <= 0:
+        raise ValueError("timeout must be positive")
+
+    corpus = MazeCorpus(corpus_path)
+    if maze_indices is None:
+        maze_indices = range(len(corpus))
+    keys = {}   # Maps each (solver_path, maze_index) pair to its cache key
+    if cache is not None:
+        grid_hashes = {maze_index: hash_grid(corpus.get_grid(maze_index)) for maze_index in maze_indices}
+        for solver_path in solver_paths:
+            try:
+                solver_hash = hash_solver_source(solver_path)
+            except OSError:     # Not cached, so that the worker reports the error
+                continue
+            for maze_index in maze_indices:
+                keys[(solver_path, maze_index)] = make_key(solver_hash, grid_hashes[maze_index])
+    corpus.close()
+
+    written = 0
+    with open(output_path, "a") as output_file:
+        def write_result(result: dict, cached: bool) -> None:
+            nonlocal written
+            result["cached"] = cached
+            output_file.write(json.dumps(result) + "\n")
+            output_file.flush()
+            written += 1
+
+        # Answer the pairs that are cached, and queue the rest.
+        tasks = collections.deque()
+        for solver_path in solver_paths:
+            for maze_index in maze_indices:
+                key = keys.get((solver_path, maze_index))
+                entry = None if key is None else cache.get(key)
+                if entry is None:
+                    tasks.append((solver_path, maze_index))
+                    continue
+                (result, _) = entry
+                result["solver"] = solver_path
+                result["maze"] = maze_index
+                write_result(result, True)
+
+        pool = [_Worker(memory_limit_mb) for _ in range(min(workers, len(tasks)))]
+        try:
+            while tasks or any(worker.task is not None for worker in pool):
+                # Hand out tasks to idle workers.
+                for worker in pool:
+                    if worker.task is None and tasks:
+                        worker.start_task(tasks.popleft(), corpus_path)
+
+                # Wait for a result, or for the nearest deadline.
+                busy = [worker for worker in pool if worker.task is not None]
+                wait_time = max(0.0, min(worker.deadline for worker in busy) - time.monotonic())
+                ready = multiprocessing.connection.wait([worker.connection for worker in busy], timeout=wait_time)
+
+                results = []
+                for worker in busy:
+                    if worker.connection in ready:
+                        result = worker.receive(timeout)
+                        if result is not None:
+                            results.append(result)
+                    elif time.monotonic() >= worker.deadline:
+                        if worker.is_started:
+                            results.append(worker.kill_task("timeout", f"call took longer than {timeout} seconds"))
+                        else:
+                            results.append(worker.kill_task("timeout", f"setup took longer than {SETUP_TIMEOUT} seconds"))
+                for (result, directions) in results:
+                    # Only cache results that the same solver would give again.  Timeouts, crashes and errors may
+                    # depend on the load of the machine.
+                    key = keys.get((result["solver"], result["maze"]))
+                    if key is not None and result["status"] == "ok":
+                        cache.put(key, result, directions)
+                    write_result(result, False)
+        finally:
+            for worker in pool:
+                worker.stop()
+    return written
+
+
+#
+# CLASSES
+#
+class _Worker:
+    """One worker process of grade(), and the task it is running, if any."""
+
+    def __init__(self, memory_limit_mb: int):
+        self.memory_limit_mb = memory_limit_mb
+        self.task = None
+        self.deadline = None
+        self.is_started = False     # Whether the solver's call for the current task has started
+        self._start_process()
+
+    def _start_process(self) -> None:
+        (self.connection, child_connection) = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_main, args=(child_connection, self.memory_limit_mb), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def start_task(self, task: tuple, corpus_path: str) -> None:
+        """Send task, a (solver_path, maze_index) pair, to the worker process.  Until the solver's call starts, the
+        deadline is the one for setting up the call.
+        """
+        self.task = task
+        self.deadline = time.monotonic() + SETUP_TIMEOUT
+        self.is_started = False
+        self.connection.send((task[0], corpus_path, task[1]))
+
+    def receive(self, timeout: float):
+        """Receive the next message of the current task.  If it says the solver's call has started, start its timeout
+        seconds and return None.  Otherwise return the (result, directions) of the task.  If the process died instead,
+        replace it and report a crash.
+        """
+        try:
+            message = self.connection.recv()
+        except (EOFError, OSError):
+            return self.kill_task("crashed", "worker process died")
+        if message == _STARTED:
+            self.deadline = time.monotonic() + timeout
+            self.is_started = True
+            return None
+        self.task = None
+        return message
+
+    def kill_task(self, status: str, message: str) -> tuple:
+        """Kill the worker process, replace it with a new one, and return a (result, None) pair for the current task."""
+        result = (_failed_result(self.task[0], self.task[1], status, message), None)
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+        self.task = None
+        self.is_started = False
+        self._start_process()
+        return result
+
+    def stop(self) -> None:
+        """Shut down the worker process."""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+def _worker_main(connection, memory_limit_mb: int) -> None:
+    """Body of a worker process.  Runs (solver_path, corpus_path, maze_index) tasks from connection until it closes,
+    and sends back a (result, directions) pair for each, where directions is None unless the solver returned some.
+    Once the maze and the solver are loaded, and just before the solver is called, it sends _STARTED, so that the
+    call's timeout doesn't include the setup.
+    """
+    if memory_limit_mb is not None:
+        try:
+            import resource     # Not available on Windows
+            limit = memory_limit_mb * 2**20
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+
+    solvers = {}        # Maps solver path to its module, or to the error message from loading it
+    corpora = {}        # Maps corpus path to its MazeCorpus
+    optimal_lengths = {}    # Maps (corpus path, maze index) to the length of a shortest path
+    while True:
+        try:
+            (solver_path, corpus_path, maze_index) = connection.recv()
+        except EOFError:
+            return
+        result = None
+        # Set up the call.  An error here, such as a bad maze index or an unreadable corpus, is the grader's and not the
+        # solver's, so it is reported as an error of the setup rather than crashing the worker.
+        try:
+            if corpus_path not in corpora:
+                corpora[corpus_path] = MazeCorpus(corpus_path)
+            maze = corpora[corpus_path][maze_index]
+            if (corpus_path, maze_index) not in optimal_lengths:
+                optimal_lengths[(corpus_path, maze_index)] = maze.optimal_length()
+            if solver_path not in solvers:
+                try:
+                    solvers[solver_path] = load_solver(solver_path)
+                except Exception:
+                    solvers[solver_path] = "could not load solver: " + traceback.format_exc(limit=-1).strip()
+            if isinstance(solvers[solver_path], str):
+                result = (_failed_result(solver_path, maze_index, "error", solvers[solver_path]), None)
+        except MemoryError:
+            result = (_failed_result(solver_path, maze_index, "error", "memory limit exceeded"), None)
+        except Exception:
+            message = "could not set up the call: " + traceback.format_exc(limit=-1).strip()
+            result = (_failed_result(solver_path, maze_index, "error", message), None)
+
+        if result is None:
+            connection.send(_STARTED)
+            try:
+                result = _run_solver(solvers[solver_path], solver_path, maze, maze_index,
+                                     optimal_lengths[(corpus_path, maze_index)])
+            except MemoryError:
+                result = (_failed_result(solver_path, maze_index, "error", "memory limit exceeded"), None)
+        connection.send(result)
+
+
+def _run_solver(solver, solver_path: str, maze, maze_index: int, optimal_length: int) -> tuple:
+    """Run solver.get_directions on maze, and return a (result, directions) pair for it.  directions is None if the
+    solver raised an error.
+    """
+    def add_counts(result: dict) -> None:
+        """Add "expansions", the calls so far that asked for a cell's moves or neighbors, and "cells_touched" to result.
+        Both are None if the solver hasn't called any instrumented method, since then there is nothing to count.
+        """
+        if sum(instrumented_maze.calls.values()) == 0:
+            result["expansions"] = None
+            result["cells_touched"] = None
+        else:
+            result["expansions"] = sum(instrumented_maze.calls[name] for name in EXPANSION_METHODS)
+            result["cells_touched"] = instrumented_maze.cells_touched()
+
+    instrumented_maze = InstrumentedMaze(maze, timing=False)
+
+    start_time = time.perf_counter()
+    try:
+        directions = solver.get_directions(instrumented_maze)
+    except MemoryError:
+        return _failed_result(solver_path, maze_index, "error", "memory limit exceeded"), None
+    except Exception:
+        result = _failed_result(solver_path, maze_index, "error", traceback.format_exc(limit=-1).strip())
+        result["wall_time_s"] = time.perf_counter() - start_time
+        add_counts(result)
+        return result, None
+    wall_time = time.perf_counter() - start_time
+
+    result = {"solver": solver_path, "maze": maze_index, "status": "ok", "wall_time_s": wall_time}
+    add_counts(result)
+    result.update(validation.score_directions(maze, directions, optimal_length))
+    # Send back plain strings, since the solver's own objects might not survive being pickled.
+    directions = [str(direction) for direction in directions] if isinstance(directions, list) else None
+    return result, directions
+
+
+def _failed_result(solver_path: str, maze_index: int, status: str, message: str) -> dict:
+    """Return a result dict for a call that didn't produce directions."""
+    return {"solver": solver_path, "maze": maze_index, "status": status, "wall_time_s": None, "expansions": None,
+            "cells_touched": None,
+            "valid": False, "reached_goal": False, "first_illegal_step": None, "path_length": None,
+            "optimal_length": None, "optimality": 0.0, "error": message}
+
+
+def main(argv: list = None) -> int:
+    """Grade solvers from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", help="maze corpus file written by corpus.write_corpus()")
+    parser.add_argument("output", help="JSONL file to append results to")
+    parser.add_argument("solvers", nargs="+", help="Python files defining get_directions(maze)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds allowed per call")
+    parser.add_argument("--memory-limit", type=int, default=None, help="MiB of address space allowed per worker")
+    parser.add_argument("--cache-dir", default=None, help="directory to keep results in between runs (default: none)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_DISK_BYTES // 2**20,
+                        help="MiB of results kept in the cache directory")
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache_dir is not None:
+        cache = ResultCache(args.cache_dir, disk_bytes=args.cache_size * 2**20)
+    written = grade(args.solvers, args.corpus, args.output, workers=args.workers, timeout=args.timeout,
+                    memory_limit_mb=args.memory_limit, cache=cache)
+    print(f"Wrote {written} results to {args.output}")
+    if cache is not None:
+        print(f"{cache.hits} results came from the cache")
+    return 0
+
+
+#
+# MAIN SCRIPT
+#
+if __name__ == "__main__":
+    sys.exit(main())
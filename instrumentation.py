@@ -0,0 +1,285 @@
+"""Opt-in instrumentation of the Maze methods that solvers call, to see how hard a solver works.
+
+Wrap a maze with InstrumentedMaze and hand the wrapper to the solver instead.  The wrapper counts calls to each public
+Maze method, adds up the time spent in each, records which cells were asked about, and passes every call to any
+callbacks that were added.  EventMaze is a lighter wrapper that only reports the cells a solver expands and reaches,
+and MarkingMaze is lighter still: it only marks those cells in a bytearray that another thread can read.
+Plain Maze objects are not touched, so code that doesn't use the wrappers pays nothing.
+"""
+
+
+import time
+from maze import Maze
+
+
+#
+# CONSTANTS
+#
+MARK_REACHED = 1    # Mark of a cell the solver has learned it can reach
+MARK_EXPANDED = 2   # Mark of a cell the solver has asked for the moves out of
+
+
+#
+# CLASSES
+#
+class InstrumentedMaze(Maze):
+    """A Maze that records how it is used.  It shares its grid and other attributes with the Maze it wraps, so it
+    behaves exactly like that maze, and passes isinstance(..., Maze) checks.
+    Changes to the grid or the costs, through the wrapper or to the wrapped maze itself, are made to the wrapped maze
+    and picked up by the wrapper, so the two always describe the same maze.
+    """
+
+    INSTRUMENTED_METHODS = ["get_legal_moves", "get_next_space", "is_winning_position", "get_legal_moves_unchecked",
+                            "get_next_space_unchecked", "get_neighbors_unchecked", "get_flat_neighbors_unchecked",
+                            "is_winning_index_unchecked"]
+
+    def __init__(self, maze, timing: bool = True):
+        """maze is the Maze to wrap.
+        timing is whether to time each call.  Turning it off makes the wrapper cheaper when only counts are needed.
+        """
+        # Handle errors
+        # maze not a Maze object
+        if not isinstance(maze, Maze):
+            raise TypeError("maze must be a Maze object")
+
+        self.wrapped_maze = maze
+        self._maze_names = set()    # Names of the attributes copied from the wrapped maze
+        self._sync()
+        self.timing = timing
+        self.calls = {name: 0 for name in self.INSTRUMENTED_METHODS}     # Number of calls to each method
+        self.time_s = {name: 0.0 for name in self.INSTRUMENTED_METHODS}  # Total seconds spent in each method
+        self._callbacks = []
+
+    @property
+    def grid(self):
+        self._sync()
+        return self._grid
+
+    @grid.setter
+    def grid(self, grid) -> None:
+        """Replace the grid of the wrapped maze, as described in Maze's grid setter."""
+        self.wrapped_maze.grid = grid
+        self._sync()
+
+    @property
+    def costs(self):
+        self._sync()
+        return self._costs
+
+    @costs.setter
+    def costs(self, costs) -> None:
+        """Replace the costs of the wrapped maze, as described in Maze's costs setter."""
+        self.wrapped_maze.costs = costs
+        self._sync()
+
+    def set_cell(self, r: int, c: int, value: int) -> None:
+        """Set a cell of the wrapped maze, as described in Maze.set_cell()."""
+        self.wrapped_maze.set_cell(r, c, value)
+        self._sync()
+
+    def add_callback(self, callback) -> None:
+        """Call callback(method_name, args, result, elapsed_s) after every call to an instrumented method.
+        elapsed_s is None if timing is off.  Callbacks run in the order they were added.
+        """
+        # Handle errors
+        # callback not callable
+        if not callable(callback):
+            raise TypeError("callback must be callable")
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback) -> None:
+        """Stop calling callback."""
+        self._callbacks.remove(callback)
+
+    def cells_touched(self) -> int:
+        """Return the number of distinct cells that instrumented methods were called on."""
+        return len(self._touched) - self._touched.count(0)
+
+    def get_stats(self) -> dict:
+        """Return a dict of everything recorded so far: "calls" and "time_s" map method names to counts and seconds,
+        "cells_touched" is the number of distinct cells asked about, and "coverage" is that as a fraction of all halls.
+        """
+        self._sync()
+        hall_count = int((self.grid != 1).sum())
+        return {
+            "calls": dict(self.calls),
+            "time_s": dict(self.time_s),
+            "cells_touched": self.cells_touched(),
+            "coverage": self.cells_touched() / hall_count,
+        }
+
+    def reset(self) -> None:
+        """Forget everything recorded so far.  Callbacks are kept."""
+        for name in self.INSTRUMENTED_METHODS:
+            self.calls[name] = 0
+            self.time_s[name] = 0.0
+        self._touched = bytearray(len(self._touched))
+
+    def _record(self, name: str, args: tuple, is_flat: bool = False):
+        """Run the wrapped maze's method called name on args, and record the call.  The cell called on is args[0] if
+        is_flat, or else (args[0], args[1]).  Calls that raise an error are not recorded.
+        """
+        self._sync()
+        method = getattr(self.wrapped_maze, name)
+        if self.timing:
+            start_time = time.perf_counter()
+            result = method(*args)
+            elapsed = time.perf_counter() - start_time
+            self.time_s[name] += elapsed
+        else:
+            result = method(*args)
+            elapsed = None
+        self.calls[name] += 1
+        self._touched[args[0] if is_flat else args[0] * self.cols + args[1]] = 1
+        for callback in self._callbacks:
+            callback(name, args, result, elapsed)
+        return result
+
+    def _sync(self) -> None:
+        """Copy the wrapped maze's attributes again if its grid or costs have changed since they were last copied.
+        Cached values that the wrapped maze has dropped since then are dropped too.  If the grid's size changed, the
+        cells touched so far are forgotten, since they no longer fit it.
+        """
+        maze = self.wrapped_maze
+        if self.__dict__.get("_grid") is maze._grid and self.__dict__.get("_costs") is maze._costs:
+            return
+        for name in self._maze_names - maze.__dict__.keys():
+            del self.__dict__[name]
+        self.__dict__.update(maze.__dict__)
+        self._maze_names = set(maze.__dict__)
+        if len(self.__dict__.get("_touched", b"")) != maze.rows * maze.cols:
+            self._touched = bytearray(maze.rows * maze.cols)   # 1 for each cell that a method was called on
+
+    def get_legal_moves(self, r: int, c: int) -> list:
+        return self._record("get_legal_moves", (r, c))
+
+    def get_next_space(self, r: int, c: int, direction: str) -> list:
+        return self._record("get_next_space", (r, c, direction))
+
+    def is_winning_position(self, r: int, c: int) -> bool:
+        return self._record("is_winning_position", (r, c))
+
+    def get_legal_moves_unchecked(self, r: int, c: int) -> tuple:
+        return self._record("get_legal_moves_unchecked", (r, c))
+
+    def get_next_space_unchecked(self, r: int, c: int, direction: str) -> tuple:
+        return self._record("get_next_space_unchecked", (r, c, direction))
+
+    def get_neighbors_unchecked(self, r: int, c: int) -> list:
+        return self._record("get_neighbors_unchecked", (r, c))
+
+    def get_flat_neighbors_unchecked(self, index: int) -> list:
+        return self._record("get_flat_neighbors_unchecked", (index,), is_flat=True)
+
+    def is_winning_index_unchecked(self, index: int) -> bool:
+        return self._record("is_winning_index_unchecked", (index,), is_flat=True)
+
+
+class EventMaze(Maze):
+    """A Maze that reports the cells a solver expands, and the cells it learns it can reach, to a listener.  Like
+    InstrumentedMaze, it shares everything with the Maze it wraps, but it only overrides the methods that move around
+    the maze, and calls the listener directly instead of through callbacks, since a solver may call them millions of
+    times.
+    """
+
+    def __init__(self, maze, events):
+        """maze is the Maze to wrap.
+        events is the listener.  events.expand(index) is called when the solver asks for the moves out of the cell at
+        flat index index, and events.reach(index) when the solver asks where a single move leads.  The listener works
+        out which cells an expanded cell leads to from maze.move_masks itself, when it needs them, so that the solver
+        doesn't pay for it.  traces.TraceRecorder is a listener.
+        """
+        # Handle errors
+        # maze not a Maze object
+        if not isinstance(maze, Maze):
+            raise TypeError("maze must be a Maze object")
+
+        self.__dict__.update(maze.__dict__)
+        self.events = events
+        self._expand = events.expand   # Bound once, since it is called on every expansion
+
+    def get_legal_moves(self, r: int, c: int) -> list:
+        moves = Maze.get_legal_moves(self, r, c)
+        self._expand(r * self.cols + c)
+        return moves
+
+    def get_next_space(self, r: int, c: int, direction: str) -> list:
+        space = Maze.get_next_space(self, r, c, direction)
+        self.events.reach(space[0] * self.cols + space[1])
+        return space
+
+    def get_legal_moves_unchecked(self, r: int, c: int) -> tuple:
+        self._expand(r * self.cols + c)
+        return Maze.get_legal_moves_unchecked(self, r, c)
+
+    def get_next_space_unchecked(self, r: int, c: int, direction: str) -> tuple:
+        space = Maze.get_next_space_unchecked(self, r, c, direction)
+        self.events.reach(space[0] * self.cols + space[1])
+        return space
+
+    def get_neighbors_unchecked(self, r: int, c: int) -> list:
+        self._expand(r * self.cols + c)
+        return Maze.get_neighbors_unchecked(self, r, c)
+
+    def get_flat_neighbors_unchecked(self, index: int) -> list:
+        self._expand(index)
+        return [(index + offset, move) for (offset, move) in self._flat_steps_by_mask[self._flat_move_masks[index]]]
+
+
+class MarkingMaze(Maze):
+    """A Maze that marks the cells a solver expands, and the cells it learns it can reach, in a bytearray with one byte
+    per cell.  Marking a cell is a single store rather than a call, so it costs the solver much less than EventMaze
+    does, but the order in which the cells were marked is not kept.  live_view reads the marks from another thread.
+    """
+
+    def __init__(self, maze, marks: bytearray):
+        """maze is the Maze to wrap.
+        marks has one byte per cell of maze, by flat index.  A cell's byte is set to MARK_EXPANDED when the solver asks
+        for the moves out of it, and to MARK_REACHED, unless it is marked already, when the solver asks where a single
+        move leads to it.  Marks only ever go up, so a reader that compares marks with a copy it took earlier finds every
+        cell that changed since.
+        """
+        # Handle errors
+        # maze not a Maze object
+        if not isinstance(maze, Maze):
+            raise TypeError("maze must be a Maze object")
+        # marks not a bytearray
+        if not isinstance(marks, bytearray):
+            raise TypeError("marks must be a bytearray")
+        # marks not one byte per cell
+        if len(marks) != maze.rows * maze.cols:
+            raise ValueError("marks must have one byte per cell of maze")
+
+        self.__dict__.update(maze.__dict__)
+        self.marks = marks
+
+    def get_legal_moves(self, r: int, c: int) -> list:
+        moves = Maze.get_legal_moves(self, r, c)
+        self.marks[r * self.cols + c] = MARK_EXPANDED
+        return moves
+
+    def get_next_space(self, r: int, c: int, direction: str) -> list:
+        space = Maze.get_next_space(self, r, c, direction)
+        index = space[0] * self.cols + space[1]
+        if not self.marks[index]:
+            self.marks[index] = MARK_REACHED
+        return space
+
+    def get_legal_moves_unchecked(self, r: int, c: int) -> tuple:
+        self.marks[r * self.cols + c] = MARK_EXPANDED
+        return Maze.get_legal_moves_unchecked(self, r, c)
+
+    def get_next_space_unchecked(self, r: int, c: int, direction: str) -> tuple:
+        space = Maze.get_next_space_unchecked(self, r, c, direction)
+        index = space[0] * self.cols + space[1]
+        if not self.marks[index]:
+            self.marks[index] = MARK_REACHED
+        return space
+
+    def get_neighbors_unchecked(self, r: int, c: int) -> list:
+        self.marks[r * self.cols + c] = MARK_EXPANDED
+        return Maze.get_neighbors_unchecked(self, r, c)
+
+    def get_flat_neighbors_unchecked(self, index: int) -> list:
+        self.marks[index] = MARK_EXPANDED
+        return [(index + offset, move) for (offset, move) in self._flat_steps_by_mask[self._flat_move_masks[index]]]
@@ -0,0 +1,107 @@
+"""Corridor-compressed view of a maze, for fast search.
+
+Most halls of a generated maze have exactly two open neighbors, so they just continue a corridor.  A JunctionGraph
+keeps only the other halls (junctions, dead ends, the start and the goal) as nodes, and joins them with one weighted
+edge per corridor.  Searching it visits far fewer nodes than searching the grid, and the moves stored on each edge turn
+the result back into the usual 'u'/'d'/'l'/'r' list.
+"""
+
+
+import heapq
+import numpy as np
+from maze import MOVE_BITS, MOVES, REVERSE_MOVES, get_flat_offsets
+
+
+#
+# CONSTANTS
+#
+_BITS = [MOVE_BITS[move] for move in MOVES]     # Bit of each move number in a move mask
+_REVERSE_NUMBERS = [MOVES.index(REVERSE_MOVES[move]) for move in MOVES]     # Number of the move that undoes each one
+_REVERSE_TABLE = str.maketrans(REVERSE_MOVES)   # For str.translate()
+_DEGREE_BY_MASK = np.array([bin(mask).count("1") for mask in range(16)], dtype=np.uint8)
+
+
+#
+# CLASSES
+#
+class JunctionGraph:
+    """Graph whose nodes are the halls of a maze that don't have exactly two open neighbors, plus the start and goal.
+    Nodes are flat indices r * cols + c.  self.edges maps each node to a list of (neighbor, length, moves) tuples, one
+    per corridor leaving it, where moves is a string of the 'u'/'d'/'l'/'r' moves along the corridor.
+    """
+
+    def __init__(self, maze):
+        """Build the graph of maze.  Usually Maze.get_junction_graph() is used instead, which caches the graph."""
+        self.rows = maze.rows
+        self.cols = maze.cols
+        self.start = (maze.rows - 1) * maze.cols
+        self.goal = maze.winning_position[0] * maze.cols + maze.winning_position[1]
+
+        masks = maze.move_masks
+        is_node = (maze.grid != 1) & (_DEGREE_BY_MASK[masks] != 2)
+        is_node = is_node.ravel()
+        is_node[self.start] = True
+        is_node[self.goal] = True
+        self.nodes = np.flatnonzero(is_node)
+        self.edges = {int(node): [] for node in self.nodes}
+        self.hall_count = int(np.count_nonzero(maze.grid != 1))
+
+        # Follow each corridor from one end to the other.  Each corridor is walked once, and its edge is added in both
+        # directions.
+        offsets = get_flat_offsets(self.cols)
+        flat_masks = masks.tobytes()
+        is_node = is_node.tobytes()
+        is_walked = set()   # (node, move number) pairs whose corridor is already in self.edges
+        for node in self.edges:
+            for move_number in range(len(MOVES)):
+                if not flat_masks[node] & _BITS[move_number] or (node, move_number) in is_walked:
+                    continue
+                moves = [move_number]
+                index = node + offsets[move_number]
+                came_from = _REVERSE_NUMBERS[move_number]
+                while not is_node[index]:
+                    # A corridor cell has exactly two moves, and one of them leads back.
+                    mask = flat_masks[index] & ~_BITS[came_from]
+                    move_number = _BITS.index(mask)
+                    moves.append(move_number)
+                    index += offsets[move_number]
+                    came_from = _REVERSE_NUMBERS[move_number]
+                is_walked.add((index, came_from))
+                moves = "".join(MOVES[number] for number in moves)
+                self.edges[node].append((index, len(moves), moves))
+                if index != node:
+                    self.edges[index].append((node, len(moves), moves[::-1].translate(_REVERSE_TABLE)))
+                else:
+                    is_walked.add((node, came_from))
+
+    def get_directions(self) -> list:
+        """Return a shortest list of directions from the start to the goal, found by A* over the junction nodes with a
+        Manhattan distance heuristic.  Raises a RuntimeError if the goal can't be reached.
+        """
+        (goal_r, goal_c) = divmod(self.goal, self.cols)
+        best_g = {self.start: 0}
+        parents = {self.start: None}    # Maps each reached node to (previous node, moves from it)
+        fringe = [(0, 0, self.start)]
+        while fringe:
+            (_, g, node) = heapq.heappop(fringe)
+            if node == self.goal:
+                break
+            if g > best_g[node]:
+                continue    # A better route to node was found after this entry was pushed
+            for (neighbor, length, moves) in self.edges[node]:
+                new_g = g + length
+                if new_g < best_g.get(neighbor, new_g + 1):
+                    best_g[neighbor] = new_g
+                    parents[neighbor] = (node, moves)
+                    (neighbor_r, neighbor_c) = divmod(neighbor, self.cols)
+                    heapq.heappush(fringe, (new_g + abs(goal_r - neighbor_r) + abs(goal_c - neighbor_c), new_g, neighbor))
+        else:
+            raise RuntimeError("There is no path from the start to the goal")
+
+        # Walk the parents back from the goal, joining the corridors' moves.
+        corridors = []
+        node = self.goal
+        while parents[node] is not None:
+            (node, moves) = parents[node]
+            corridors.append(moves)
+        return list("".join(reversed(corridors)))
@@ -0,0 +1,213 @@
+"""Live view of a solver's search, drawn while the solver runs.
+
+plot_search() runs the solver on a worker thread, on an instrumentation.MarkingMaze that marks each cell the solver
+expands (asks for the moves out of) or learns it can reach, in a SearchEvents' bytearray of one byte per cell.  The
+marks are the queue between the two threads: they never take more memory than that byte per cell, marking a cell is a
+single store that never blocks the solver, and the solver's answer is handed over once it returns.
+The tkinter window reads the marks in after() callbacks, a whole batch of changed cells at a time, spending at most a
+fixed budget of time on each, and repaints only the cells whose state changed.  The maze is drawn as a PhotoImage with
+one block of pixels per cell, so even a 500x500 maze is a single canvas item, and the window stays responsive
+throughout.
+"""
+
+
+import threading
+import time
+import numpy as np
+import raster
+from instrumentation import MARK_EXPANDED, MARK_REACHED, MarkingMaze
+from maze import MOVE_BITS, MOVES, Maze, get_flat_offsets
+
+
+#
+# CONSTANTS
+#
+ENQUEUED = MARK_REACHED     # State of a cell the solver has learned it can reach
+EXPANDED = MARK_EXPANDED    # State of a cell the solver has asked for the moves out of
+STATE_COLORS = {ENQUEUED: "#F0D080", EXPANDED: "#E08040"}
+DEFAULT_INTERVAL_MS = 30    # Time between repaints
+DEFAULT_BUDGET_MS = 8   # Most time each repaint may take
+DEFAULT_WINDOW_PIXELS = 800     # Largest side of the maze on screen, if cell_pixels isn't given
+_PAINT_CHUNK = 256  # Cells painted between checks of the time budget
+
+
+#
+# CLASSES
+#
+class SearchEvents:
+    """Collects what one search did, for a consumer on another thread.
+    self.marks is the bytearray that an instrumentation.MarkingMaze marks, ENQUEUED or EXPANDED, by flat index.  The
+    cells next to an expanded cell are not marked on their own: drain_events() works them out from the maze's move masks,
+    on the consumer's side, so that the solver's thread does as little as possible.
+    """
+
+    def __init__(self, maze):
+        """maze is the Maze being searched."""
+        self.marks = bytearray(maze.rows * maze.cols)
+        self.directions = None  # The solver's answer, once it returns
+        self.error = None   # The exception the solver raised, if it did
+        self.done = threading.Event()   # Set once the solver has returned or raised
+        # Used by drain_events(): the marks as a numpy array, the move masks of the maze, the (bit, flat offset) of each
+        # move, the state of each cell as last drained, and whether the marks have been read since the search ended.
+        self._marks = np.frombuffer(self.marks, dtype=np.uint8)
+        self._masks = maze.move_masks.ravel()
+        self._steps = [(MOVE_BITS[move], offset) for (move, offset) in zip(MOVES, get_flat_offsets(maze.cols))]
+        self._drained_states = np.zeros(maze.rows * maze.cols, dtype=np.uint8)
+        self._is_drained = False
+
+    def finish(self, directions: list = None, error: Exception = None) -> None:
+        """Record the solver's answer, or the error it raised.  Marks not read yet are left for drain_events() to pick
+        up, so this never waits either.
+        """
+        self.directions = directions
+        self.error = error
+        self.done.set()
+
+    def is_drained(self) -> bool:
+        """Return whether the search is over and every cell it marked has been taken by drain_events()."""
+        return self._is_drained
+
+
+#
+# HELPER FUNCTIONS
+#
+def start_search(solver, maze, events: SearchEvents) -> threading.Thread:
+    """Start a daemon thread that runs solver.get_directions on a MarkingMaze of maze that marks events.marks, and
+    calls events.finish() when it is done.  Returns the thread.
+    """
+    marking_maze = MarkingMaze(maze, events.marks)
+
+    def run() -> None:
+        try:
+            directions = solver.get_directions(marking_maze)
+        except Exception as error:
+            events.finish(error=error)
+        else:
+            events.finish(directions=directions)
+
+    thread = threading.Thread(target=run, name="search", daemon=True)
+    thread.start()
+    return thread
+
+
+def drain_events(events: SearchEvents) -> tuple:
+    """Take every cell marked since the last call, and return (indices, states): the flat index and latest state of
+    each cell that changed, in numpy arrays.  The marks are read in one vectorized pass while the solver keeps running.
+    """
+    is_done = events.done.is_set()     # Checked first, so that no cell can be marked after the last pass
+    drained_states = events._drained_states
+
+    # Marks only go up, so a cell changed if its mark is above its state as last drained.  Each cell's mark is read
+    # once, so a mark that goes up during this pass is taken next time.
+    changed = np.flatnonzero(events._marks > drained_states)
+    marks = events._marks[changed]
+    expanded = changed[marks == EXPANDED]
+    reached = [changed[marks == ENQUEUED]]
+
+    # The cells next to an expanded cell are reached when it is.
+    masks = events._masks[expanded]
+    for (bit, offset) in events._steps:
+        reached.append(expanded[(masks & bit) != 0] + offset)
+    drained_states[expanded] = EXPANDED
+    reached = np.concatenate(reached)
+    reached = np.unique(reached[drained_states[reached] == 0])
+    drained_states[reached] = ENQUEUED
+    events._is_drained = is_done
+    return (np.concatenate([reached, expanded]),
+            np.concatenate([np.full(len(reached), ENQUEUED, dtype=np.int64), np.full(len(expanded), EXPANDED, dtype=np.int64)]))
+
+
+def paint_changes(events: SearchEvents, backlog: tuple, paint, budget_s: float) -> tuple:
+    """Call paint(index, state) for cells that changed, for up to about budget_s seconds.  backlog is the
+    (indices, states) left over from the last call, as returned by drain_events(); only once it is used up are more
+    events drained.  Returns (backlog, painted): the cells still to paint, and the number painted.
+    """
+    stop_time = time.perf_counter() + budget_s
+    (indices, states) = backlog
+    if len(indices) == 0:
+        (indices, states) = drain_events(events)
+    painted = 0
+    while painted < len(indices) and time.perf_counter() < stop_time:
+        for (index, state) in zip(indices[painted:painted + _PAINT_CHUNK].tolist(), states[painted:painted + _PAINT_CHUNK].tolist()):
+            paint(index, state)
+        painted += min(_PAINT_CHUNK, len(indices) - painted)
+    return (indices[painted:], states[painted:]), painted
+
+
+def plot_search(maze, solver, cell_pixels: int = None, interval_ms: int = DEFAULT_INTERVAL_MS,
+                budget_ms: int = DEFAULT_BUDGET_MS) -> list:
+    """Show solver's search through maze live, then its answer, in a tkinter window.  Returns the solver's directions
+    once the window is closed and the solver has returned, or raises the error the solver raised.
+    solver is a module or object with a get_directions(maze) function.
+    cell_pixels is the side of each cell on screen, in pixels.  By default it is chosen to fit the maze in about
+    DEFAULT_WINDOW_PIXELS.
+    Every interval_ms milliseconds, the window spends up to about budget_ms milliseconds reading the cells the solver
+    marked and repainting them, so the solver's thread gets the rest of the time.
+    """
+    import tkinter     # Imported here so that the rest of this module works where tkinter can't be imported
+
+    # Handle errors
+    # maze not a Maze object
+    if not isinstance(maze, Maze):
+        raise TypeError("maze must be a Maze object")
+    # solver has no get_directions
+    if not callable(getattr(solver, "get_directions", None)):
+        raise TypeError("solver must have a get_directions(maze) function")
+    if cell_pixels is None:
+        cell_pixels = max(1, DEFAULT_WINDOW_PIXELS // max(maze.rows, maze.cols))
+    # cell_pixels not a positive int
+    if not isinstance(cell_pixels, int) or cell_pixels < 1:
+        raise ValueError("cell_pixels must be a positive int")
+
+    window = tkinter.Tk()
+    window.title("Search through maze")
+    window["background"] = "#2B2B2B"
+    image = tkinter.PhotoImage(data=raster.encode_ppm(raster.render(maze, cell_pixels=cell_pixels)), format="PPM")
+    canvas = tkinter.Canvas(window, width=image.width(), height=image.height(), highlightthickness=0)
+    canvas.create_image(0, 0, image=image, anchor="nw")
+    canvas.grid(row=0, column=0)
+    status = tkinter.Label(window, text="Searching...", foreground="#CCCCCC", background="#2B2B2B")
+    status.grid(row=1, column=0)
+
+    events = SearchEvents(maze)
+    start_time = time.perf_counter()
+    start_search(solver, maze, events)
+    goal_index = maze.winning_position[0] * maze.cols + maze.winning_position[1]
+    changed_count = 0
+    backlog = drain_events(events)
+
+    def paint(index: int, color: str) -> None:
+        (r, c) = divmod(index, maze.cols)
+        image.put(color, to=(c * cell_pixels, r * cell_pixels, (c + 1) * cell_pixels, (r + 1) * cell_pixels))
+
+    def paint_state(index: int, state: int) -> None:
+        if index != goal_index:
+            paint(index, STATE_COLORS[state])
+
+    def repaint() -> None:
+        nonlocal backlog, changed_count
+        (backlog, painted) = paint_changes(events, backlog, paint_state, budget_ms / 1000)
+        changed_count += painted
+        if len(backlog[0]) > 0 or not events.is_drained():
+            status["text"] = f"Searching... {changed_count} cells reached"
+            window.after(interval_ms, repaint)
+            return
+
+        # Draw the answer.
+        elapsed = time.perf_counter() - start_time
+        if events.error is not None:
+            status["text"] = f"Solver raised {type(events.error).__name__}: {events.error}"
+            return
+        positions = raster.get_path_positions(events.directions, (maze.rows - 1, 0))
+        for (r, c) in positions.tolist():
+            if 0 <= r < maze.rows and 0 <= c < maze.cols and r * maze.cols + c != goal_index:
+                paint(r * maze.cols + c, "#%02X%02X%02X" % raster.PATH_COLOR)
+        status["text"] = f"Done in {elapsed:.2f} s: {len(events.directions)} moves, {changed_count} cells reached"
+
+    window.after(interval_ms, repaint)
+    window.mainloop()
+
+    events.done.wait()
+    if events.error is not None:
+        raise events.error
+    return events.directions
@@ -3,7 +3,6 @@
 
 from maze import Maze
 from pathfinder import get_directions
-from plotter import plot_directions
 
 
 #
@@ -15,5 +14,7 @@ problem = Maze()
 # Give student maze and request response
 direction_list = get_directions(problem)
 
-# Plot maze with the user's directions
+# Plot maze with the user's directions.  The plotter is only imported now, so that building and solving the maze
+# doesn't wait for tkinter to load.
+from plotter import plot_directions
 plot_directions(problem, direction_list)
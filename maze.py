@@ -1,197 +1,372 @@
 """Definition of the maze itself"""
 
 
+import collections
+import functools
 import numpy as np
+import os
 import random
+from generators import GENERATORS, MAX_COST, generate_costs
+
+
+#
+# MOVE LAYOUT
+# The moves, and how move masks such as Maze.move_masks encode them.  Other modules use these instead of spelling the
+# layout out again.
+#
+MOVES = ("u", "d", "l", "r")    # Every move.  A move's number is its index in MOVES
+MOVE_BITS = {"u": 1, "d": 2, "l": 4, "r": 8}    # Bit of each move in a move mask
+MOVE_DELTAS = {"u": (-1, 0), "d": (1, 0), "l": (0, -1), "r": (0, 1)}     # (row, column) change of each move
+REVERSE_MOVES = {"u": "d", "d": "u", "l": "r", "r": "l"}    # The move that undoes each move
+# The moves out of a cell with each of the 16 move masks, in the order of MOVES
+MOVES_BY_MASK = tuple(tuple(move for move in MOVES if mask & MOVE_BITS[move]) for mask in range(16))
 
 
 class Maze:
     """Fully defines a maze for the rover to explore."""
 
-    def __init__(self):
-        """self._walls is a list of Zone objects.
-        self._goal is a Zone object.
-        self.grid is the underlying numpy grid for the maze
+    cell_length = 40    # pixels; each cell is drawn as a square of this side length.
+
+    def __init__(self, rows: int = 20, cols: int = 20, seed=None, algorithm: str = "prims", max_cost: int = None):
+        """rows and cols give the size of the maze in cells.
+        seed seeds the numpy.random.Generator used to build the maze.  It may be an int, or anything else accepted by
+        numpy.random.default_rng().  If seed is None, a seed is drawn from the random module, so random.seed() still
+        makes unseeded mazes reproducible.
+        algorithm names the generator that carves the maze, one of generators.GENERATORS: "prims" (the default),
+        "kruskal", or "backtracker".
+        max_cost, if given, gives the maze terrain: every cell gets a random cost of moving into it, from 1 to
+        max_cost, in self.costs.  The walls are the same as without it.
+
+        self._walls is a list of Zone objects, and self._goal is a Zone object.  Both are only built if asked for;
+        get_wall_rectangles() is a much more compact form of the walls.
+        self.winning_position is the [r, c] position of the goal.  The generator already knows it, so it is never
+        searched for.
+        self.grid is the underlying numpy grid for the maze, with dtype uint8.  It is read-only; use set_cell() or
+        assign a whole new grid, so that everything derived from it is kept up to date.
+        self.move_masks is a uint8 array of the legal moves from each cell; see _build_move_masks()
+        self.costs is a read-only uint8 array shaped like self.grid, holding the cost of moving into each cell, or None
+        if every move costs 1.  Only weighted solvers such as weighted_pathfinder use it.
         """
-        (self._walls, self._goal, self.grid) = self._generate_walls_and_goal()
-        self.winning_position = self._get_winning_position()
-
-    def _generate_walls_and_goal(self):
-        """Randomly generates _walls and the goal for this maze.
-        Uses Prim's Algorithm: https://en.wikipedia.org/wiki/Prim%27s_algorithm
+        # Handle errors
+        # rows not int
+        if not isinstance(rows, int):
+            raise TypeError("rows must be an int")
+        # cols not int
+        if not isinstance(cols, int):
+            raise TypeError("cols must be an int")
+        # rows too small
+        if rows < 2:
+            raise ValueError("rows must be at least 2")
+        # cols too small
+        if cols < 2:
+            raise ValueError("cols must be at least 2")
+        # algorithm not a string
+        if not isinstance(algorithm, str):
+            raise TypeError("algorithm must be a string")
+        # algorithm unknown
+        if algorithm not in GENERATORS:
+            raise ValueError(f"algorithm must be one of {', '.join(sorted(GENERATORS))}")
+        # max_cost not int
+        if max_cost is not None and not isinstance(max_cost, int):
+            raise TypeError("max_cost must be an int")
+        # max_cost out of range
+        if max_cost is not None and not (1 <= max_cost <= MAX_COST):
+            raise ValueError(f"max_cost must be from 1 to {MAX_COST}")
+
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.rows = rows
+        self.cols = cols
+        self.seed = seed
+        self.algorithm = algorithm
+        self._costs = None
+        rng = np.random.default_rng(seed)
+        (grid, winning_position) = self._generate_walls_and_goal(rng)
+        self._set_grid(grid, winning_position)
+        if max_cost is not None:
+            # Drawn after the walls, so that the walls don't depend on max_cost.
+            self.costs = generate_costs(rows, cols, max_cost, rng)
+
+    @classmethod
+    def from_grid(cls, grid, seed=None, costs=None):
+        """Build a Maze around an existing grid, such as one loaded from a corpus file, without generating a new one.
+        grid is a 2D array of 0s (halls), 1s (walls), exactly one 2 (goal), and a 3 (start) in the bottom-left corner.
+        seed is only recorded, in case the caller knows the seed grid was generated from.  algorithm is None, since it
+        isn't known.
+        costs, if given, becomes self.costs, as described in the costs setter.
         """
+        maze = cls.__new__(cls)
+        maze.seed = seed
+        maze.algorithm = None
+        maze._costs = None
+        maze.grid = grid
+        maze.costs = costs
+        return maze
+
+    def __getstate__(self) -> dict:
+        """Return the state to pickle.  The memoryview of the distances can't be pickled, and is rebuilt on unpickling."""
+        state = self.__dict__.copy()
+        state["_flat_distances_to_goal"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore a pickled maze, such as one sent back by a worker of generate_mazes().  Pickling doesn't keep numpy's
+        read-only flags, so they are set again, so that the grid still can't be changed without updating its caches.
+        """
+        self.__dict__.update(state)
+        for name in ["_grid", "_costs", "_distances_to_goal", "_wall_rectangles"]:
+            if self.__dict__.get(name) is not None:
+                self.__dict__[name].setflags(write=False)
+        # move_masks is a view of the bytes in _flat_move_masks, which pickling turned into a separate copy.
+        if isinstance(self.__dict__.get("_flat_move_masks"), bytes):
+            self.move_masks = np.frombuffer(self._flat_move_masks, dtype=np.uint8).reshape(np.shape(self._grid))
+        if self.__dict__.get("_distances_to_goal") is not None:
+            self._flat_distances_to_goal = memoryview(self._distances_to_goal.ravel())
+
+    @property
+    def grid(self) -> np.ndarray:
+        return self._grid
+
+    @grid.setter
+    def grid(self, grid) -> None:
+        """Replace the grid, and update everything derived from it.
+        grid is a 2D array of 0s (halls), 1s (walls), exactly one 2 (goal), and a 3 (start) in the bottom-left corner.
+        """
+        grid = np.array(grid, dtype=np.uint8)
+        # Handle errors
+        # grid not 2D
+        if grid.ndim != 2:
+            raise ValueError("grid must be 2-dimensional")
+        # grid too small
+        if np.shape(grid)[0] < 2 or np.shape(grid)[1] < 2:
+            raise ValueError("grid must be at least 2x2")
+        # grid contains an invalid cell
+        if np.any(grid > 3):
+            raise ValueError("grid must only contain 0s, 1s, 2s, and 3s")
+        # grid does not contain exactly one goal
+        goals = np.flatnonzero(grid == 2)
+        if len(goals) != 1:
+            raise ValueError("grid must contain exactly one 2")
+        # start is not in the bottom-left corner
+        if grid[-1, 0] != 3:
+            raise ValueError("the bottom-left corner of grid must be a 3")
+        # grid a different size from self.costs
+        if self._costs is not None and np.shape(grid) != np.shape(self._costs):
+            raise ValueError("grid must be the same size as costs")
+
+        self._set_grid(grid, list(divmod(int(goals[0]), np.shape(grid)[1])))
+
+    @property
+    def costs(self) -> np.ndarray:
+        return self._costs
+
+    @costs.setter
+    def costs(self, costs) -> None:
+        """Replace the costs of moving into each cell.
+        costs is None, for a cost of 1 per move, or a 2D array of ints from 1 to MAX_COST, the same size as self.grid.
+        """
+        if costs is None:
+            self._costs = None
+            return
+        costs = np.asarray(costs)
+        # Handle errors
+        # costs not integers
+        if not np.issubdtype(costs.dtype, np.integer):
+            raise TypeError("costs must be an array of ints")
+        # costs a different size from grid
+        if np.shape(costs) != np.shape(self.grid):
+            raise ValueError("costs must be the same size as grid")
+        # costs out of range
+        if costs.size > 0 and (costs.min() < 1 or costs.max() > MAX_COST):
+            raise ValueError(f"costs must be from 1 to {MAX_COST}")
+
+        costs = costs.astype(np.uint8)
+        costs.setflags(write=False)
+        self._costs = costs
+
+    def set_cell(self, r: int, c: int, value: int) -> None:
+        """Set the cell at row r and column c of self.grid to value, which is 0 (hall), 1 (wall), 2 (goal) or 3 (start).
+        The result must still be a valid grid, as described in the grid setter.
+        """
+        # Handle errors
+        # r not int
+        if not isinstance(r, int):
+            raise TypeError("r must be an int")
+        # c not int
+        if not isinstance(c, int):
+            raise TypeError("c must be an int")
+        # r out of bounds
+        if not (0 <= r < self.rows):
+            raise IndexError("r is out of bounds")
+        # c out of bounds
+        if not (0 <= c < self.cols):
+            raise IndexError("c is out of bounds")
+        # value not int
+        if not isinstance(value, int):
+            raise TypeError("value must be an int")
+        # value not a valid cell
+        if not (0 <= value <= 3):
+            raise ValueError("value must be 0, 1, 2, or 3")
+
+        grid = self.grid.copy()
+        grid[r, c] = value
+        self.grid = grid
+
+    def _set_grid(self, grid: np.ndarray, winning_position: list = None) -> None:
+        """Store grid, an already-checked uint8 array, as a read-only self.grid, and rebuild or drop everything that is
+        derived from it.  This is the only place self._grid is assigned, so caches can't go stale.
+        winning_position is the [r, c] position of the goal, if the caller already knows it.
+        """
+        grid.setflags(write=False)
+        self._grid = grid
+        self.rows = np.shape(grid)[0]
+        self.cols = np.shape(grid)[1]
+        self._winning_position = winning_position   # Found when first needed, if not given; see winning_position
+        self.__dict__.pop("_winning_index", None)   # Worked out again from winning_position when first needed
+        self._build_move_masks()
+        self._distances_to_goal = None  # Computed when first needed; see get_distances_to_goal()
+        self._flat_distances_to_goal = None
+        self._junction_graph = None     # Built when first needed; see get_junction_graph()
+        self._tree_paths = None     # Built when first needed; see get_tree_paths()
+        self._wall_rectangles = None    # Built when first needed; see get_wall_rectangles()
+        self._wall_zones = None     # Built when first needed; see _walls
+        self._goal_zone = None  # Built when first needed; see _goal
+
+    def _generate_walls_and_goal(self, rng) -> tuple:
+        """Randomly generates the walls and the goal for this maze, and returns (grid, winning_position).
+        The walls come from the generator in generators.GENERATORS named by self.algorithm.
+        rng is a numpy.random.Generator.
+        """
+        rows = self.rows
+        cols = self.cols
 
-        def _remove_duplicates_from_list(input_list):
-            """Returns a version of input_list such that redundant elements are removed."""
-            output_list = []
-            for item in input_list:
-                if item not in output_list:
-                    output_list.append(item)
-            return output_list
-
-        def _get_all_1_neighbors_of_0s(input_array):
-            """Returns a list of all indices for neighbors of 0s which are not themselves 0s.
-            input_array is an ndarray containing 0s.
-            """
-            input_height = np.shape(input_array)[0]
-            input_width = np.shape(input_array)[1]
-            neighbor_indices = []
-            for rr in range(input_height):
-                for cc in range(input_width):
-                    if input_array[rr, cc] == 0:
-                        # Check all neighbors.  Add the indices of neighboring non-0s to neighbor_indices.
-                        # Upper neighbor
-                        if rr - 1 in range(input_height):
-                            if input_array[rr - 1, cc] != 0:
-                                neighbor_indices.append([rr - 1, cc])
-                        # Lower neighbor
-                        if rr + 1 in range(input_height):
-                            if input_array[rr + 1, cc] != 0:
-                                neighbor_indices.append([rr + 1, cc])
-                        # Left neighbor
-                        if cc - 1 in range(input_width):
-                            if input_array[rr, cc - 1] != 0:
-                                neighbor_indices.append([rr, cc - 1])
-                        # Right neighbor
-                        if cc + 1 in range(input_width):
-                            if input_array[rr, cc + 1] != 0:
-                                neighbor_indices.append([rr, cc + 1])
-            neighbor_indices = _remove_duplicates_from_list(neighbor_indices)
-            return neighbor_indices
-
-        def _does_it_have_3_or_more_0_neighbors(query_index, array):
-            """Returns True if the cell at query_index has 2 or more neighbors of 0 in any direction
-            (not just crosswise).  Else returns False.
-            query_index is a list of 2 integers.
-            array is an ndarray
-            """
-            neighbor_counter = 0
-            input_height = np.shape(array)[0]
-            input_width = np.shape(array)[1]
-            r = query_index[0]
-            c = query_index[1]
-            # Check upper
-            if r - 1 in range(input_height):
-                if array[r - 1, c] == 0:
-                    neighbor_counter += 1
-                # Check upper-left
-                if c - 1 in range(input_width):
-                    if array[r - 1, c - 1] == 0:
-                        neighbor_counter += 1
-                # Check upper-right
-                if c + 1 in range(input_width):
-                    if array[r - 1, c + 1] == 0:
-                        neighbor_counter += 1
-            # Check lower
-            if r + 1 in range(input_height):
-                if array[r + 1, c] == 0:
-                    neighbor_counter += 1
-                # Check lower-left
-                if c - 1 in range(input_width):
-                    if array[r + 1, c - 1] == 0:
-                        neighbor_counter += 1
-                # Check lower-right
-                if c + 1 in range(input_width):
-                    if array[r + 1, c + 1] == 0:
-                        neighbor_counter += 1
-            # Check left
-            if c - 1 in range(input_width):
-                if array[r, c - 1] == 0:
-                    neighbor_counter += 1
-            # Check right
-            if c + 1 in range(input_width):
-                if array[r, c + 1] == 0:
-                    neighbor_counter += 1
-
-            # Return based on neighbor_counter.
-            if neighbor_counter >= 3:
-                return True
-            else:
-                return False
-
-        def _euclidean_dist(pos0, pos1):
-            """Returns the distance between pos0 and pos1.
-            pos0 is a list of 2 floats, representing a coordinate pair.
-            pos1 is a list of 2 floats, representing a coordinate pair.
-            Returns a float.
-            """
-            x0 = pos0[0]
-            y0 = pos0[1]
-            x1 = pos1[0]
-            y1 = pos1[1]
-            return ((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5
-
-        def _tkinter_coords_to_physics_coords(tkinter_coords):
-            """Converts from the tkinter canvas coordinate system to the physics coordinate system.
-            tkinter_coords is a list of 2 floats.
-            """
-            return [800 - tkinter_coords[0], tkinter_coords[1]]
-
-        maze_length = 800   # pixels; the maze is assumed square.  maze_length must be divisible by cell_length.
-        cell_length = 40    # pixels; each cell is assumed square.  cell_length must divide maze_length.
-        prims_array_length = int(maze_length / cell_length)     # nodes in an array.
-
-        # Create an nxn array, where n = prims_array_length.  Randomly weight each cell.
-        weight_array = np.array([[random.random() for _ in range(prims_array_length)] for _ in range(prims_array_length)])
-
-        # Create an nxn array of 0s (halls) and 1s (walls).  At first, have it all be walls.
-        halls_and_walls_array = np.array([[1 for _ in range(prims_array_length)] for _ in range(prims_array_length)])   # Initially everything is a wall.
-        # Mark the bottom-left spot as a hall.  This will be the starting point.
-        halls_and_walls_array[prims_array_length - 1, 0] = 0
-
-        # Generate the rest of the maze.
-        are_walls_done = False
-        while not are_walls_done:     # Each cycle of this loop creates exactly one new hall cell.
-            neighbors = _get_all_1_neighbors_of_0s(halls_and_walls_array)    # Get the indices of all walls that are neighbors of a hall.
-            # Of the wall cells neighboring a hall cell in halls_and_walls_array, make the one with lowest weight in weight_array a hall.  But if that wall is adjacent to 2 or more hall tiles, try the next-lowest-weight neighboring wall instead.  If you find no such walls, break; the maze is complete.
-            while True:
-                # Find the index with the lowest weight in neighbors.
-                lowest_index = neighbors[0]
-                lowest_weight = weight_array[lowest_index[0], lowest_index[1]]
-                for index in neighbors:
-                    this_weight = weight_array[index[0], index[1]]
-                    if this_weight < lowest_weight:
-                        lowest_weight = this_weight
-                        lowest_index = index
-                # If this wall is not adjacent to another hall, turn it into a wall and break, because it's time to make a new hall cell!
-                if not _does_it_have_3_or_more_0_neighbors(lowest_index, halls_and_walls_array):
-                    halls_and_walls_array[lowest_index[0], lowest_index[1]] = 0
-                    break
-                else:   # Else remove this wall from neighbors and try again, unless neighbors is empty, in which case the maze is complete!
-                    neighbors.remove(lowest_index)
-                    if len(neighbors) == 0:
-                        are_walls_done = True
-                        break
+        halls_and_walls_array = GENERATORS[self.algorithm](rows, cols, rng)
 
         # Put a goal marker at a point of the maze farthest from the bottom-left spot!
-        # Find a hall spot with the greatest distance from the bottom-left tile.
-        greatest_index = [prims_array_length - 1, 0]
-        greatest_distance = 0
-        for rr in range(prims_array_length):
-            for cc in range(prims_array_length):
-                if halls_and_walls_array[rr, cc] == 0:
-                    this_distance = _euclidean_dist([prims_array_length - 1, 0], [rr, cc])
-                    if this_distance > greatest_distance:
-                        greatest_index = [rr, cc]
-                        greatest_distance = this_distance
+        # Squared distances rank the halls the same way as distances, and are exact integers.  argmax returns the
+        # first greatest in row-major order.
+        squared_distances = (np.arange(rows - 1, -1, -1, dtype=np.int64)[:, np.newaxis] ** 2
+                             + np.arange(cols, dtype=np.int64) ** 2)
+        squared_distances[halls_and_walls_array != 0] = -1
+        greatest = int(np.argmax(squared_distances))
+        greatest_index = [rows - 1, 0]
+        if squared_distances.flat[greatest] > 0:
+            greatest_index = [greatest // cols, greatest % cols]
         # Change the 0 of that hall to a 2, to represent a goal.
         halls_and_walls_array[greatest_index[0], greatest_index[1]] = 2
 
         # Change the bottom-left corner to a start (3)
         halls_and_walls_array[-1, 0] = 3
 
-        # Use halls_and_walls_array to generate a list of Wall objects which use pixel coordinates.
-        output_walls = []
-        output_goal = None
-        for rr in range(prims_array_length):
-            for cc in range(prims_array_length):
-                if halls_and_walls_array[rr, cc] == 1:
-                    output_walls.append(Zone(ctl=_tkinter_coords_to_physics_coords([(rr+1)*cell_length - 1, (cc+1)*cell_length - 1]), cbr=_tkinter_coords_to_physics_coords([rr*cell_length, cc*cell_length])))
-                elif halls_and_walls_array[rr, cc] == 2:
-                    output_goal = Zone(ctl=_tkinter_coords_to_physics_coords([(rr+1)*cell_length - 1, (cc+1)*cell_length - 1]), cbr=_tkinter_coords_to_physics_coords([rr*cell_length, cc*cell_length]))
+        # Return!  If no hall was farther away than the bottom-left spot itself, the start overwrote the goal.
+        return halls_and_walls_array, (greatest_index if greatest_index != [rows - 1, 0] else None)
+
+    @property
+    def winning_position(self) -> list:
+        """[r, c] position of the goal.  Found the first time it's asked for, unless it was already known."""
+        if self._winning_position is None:
+            self._winning_position = self._get_winning_position()
+        return self._winning_position
 
-        # Return!
-        return output_walls, output_goal, halls_and_walls_array
+    @functools.cached_property
+    def _winning_index(self) -> int:
+        """Flat index of the goal.  It is worked out the first time it's asked for, so that building a maze doesn't
+        have to find the goal.  After that it is a plain attribute, which keeps is_winning_index_unchecked() fast.
+        """
+        return self.winning_position[0] * self.cols + self.winning_position[1]
+
+    @property
+    def _walls(self) -> list:
+        """List of Zone objects, one per wall cell, in pixel coordinates.  Kept for compatibility; it is built the first
+        time it's asked for, and get_wall_rectangles() is far more compact.
+        """
+        if self._wall_zones is None:
+            (self._wall_zones, self._goal_zone) = self._get_walls_and_goal_zones()
+        return self._wall_zones
+
+    @property
+    def _goal(self):
+        """Zone object of the goal cell, in pixel coordinates.  Built the first time it's asked for."""
+        if self._goal_zone is None:
+            (self._wall_zones, self._goal_zone) = self._get_walls_and_goal_zones()
+        return self._goal_zone
+
+    def _get_walls_and_goal_zones(self) -> tuple:
+        """Return a list of Zone objects for the walls of self.grid, and a Zone object for its goal.
+        These use pixel coordinates.
+        """
+
+        def _tkinter_coords_to_physics_coords(tkinter_coords):
+            """Converts from the tkinter canvas coordinate system to the physics coordinate system.
+            tkinter_coords is a list of 2 floats.
+            """
+            return [maze_height - tkinter_coords[0], tkinter_coords[1]]
+
+        rows = self.rows
+        cell_length = self.cell_length
+        maze_height = rows * cell_length    # pixels
+
+        # Only visit the wall cells, rather than every cell.
+        output_walls = []
+        for (rr, cc) in np.argwhere(self.grid == 1).tolist():
+            output_walls.append(Zone(ctl=_tkinter_coords_to_physics_coords([(rr+1)*cell_length - 1, (cc+1)*cell_length - 1]), cbr=_tkinter_coords_to_physics_coords([rr*cell_length, cc*cell_length])))
+        (rr, cc) = self.winning_position
+        output_goal = Zone(ctl=_tkinter_coords_to_physics_coords([(rr+1)*cell_length - 1, (cc+1)*cell_length - 1]), cbr=_tkinter_coords_to_physics_coords([rr*cell_length, cc*cell_length]))
+        return output_walls, output_goal
+
+    def get_wall_rectangles(self) -> np.ndarray:
+        """Return a read-only int32 array with one row [r0, c0, r1, c1] per rectangle of walls, covering rows r0 to
+        r1 - 1 and columns c0 to c1 - 1 of self.grid.  Together the rectangles cover every wall cell exactly once.
+        Runs of walls along each row are merged, and then identical runs in consecutive rows, so there are far fewer
+        rectangles than wall cells.  Built the first time it's asked for, and kept until the grid changes.
+        """
+        if self._wall_rectangles is None:
+            self._wall_rectangles = self._compute_wall_rectangles()
+        return self._wall_rectangles
+
+    def _compute_wall_rectangles(self) -> np.ndarray:
+        """Compute the array returned by get_wall_rectangles()."""
+        # Find the horizontal runs of walls in each row, from where the wall/not-wall edges are.
+        is_wall = np.zeros((self.rows, self.cols + 2), dtype=np.int8)
+        is_wall[:, 1:-1] = self.grid == 1
+        edges = np.diff(is_wall, axis=1)
+        (run_rows, run_starts) = np.nonzero(edges == 1)
+        run_ends = np.nonzero(edges == -1)[1]   # Same order as the starts: row by row, left to right
+
+        # Stack runs with the same columns in consecutive rows into one rectangle.  Sorting by (start, end, row) puts
+        # runs that can be stacked next to each other.
+        order = np.lexsort((run_rows, run_ends, run_starts))
+        (run_rows, run_starts, run_ends) = (run_rows[order], run_starts[order], run_ends[order])
+        continues_previous = np.zeros(len(run_rows), dtype=np.bool_)
+        continues_previous[1:] = ((run_starts[1:] == run_starts[:-1]) & (run_ends[1:] == run_ends[:-1])
+                                  & (run_rows[1:] == run_rows[:-1] + 1))
+        first_runs = np.flatnonzero(~continues_previous)
+        last_runs = np.concatenate([first_runs[1:] - 1, [len(run_rows) - 1]]).astype(np.int64)
+
+        rectangles = np.stack([run_rows[first_runs], run_starts[first_runs], run_rows[last_runs] + 1,
+                               run_ends[first_runs]], axis=1).astype(np.int32)
+        rectangles.setflags(write=False)
+        return rectangles
+
+    def _build_move_masks(self) -> None:
+        """Precompute a 4-bit mask of the legal moves from every cell of self.grid.
+        self.move_masks is a read-only uint8 array shaped like self.grid, whose bits are given by MOVE_BITS: bit 0 is
+        'u', bit 1 is 'd', bit 2 is 'l', and bit 3 is 'r'.  Walls have a mask of 0.
+        """
+        is_open = self.grid != 1
+        masks = np.zeros(np.shape(self.grid), dtype=np.uint8)
+        masks[1:, :] |= is_open[:-1, :] * np.uint8(MOVE_BITS["u"])
+        masks[:-1, :] |= is_open[1:, :] * np.uint8(MOVE_BITS["d"])
+        masks[:, 1:] |= is_open[:, :-1] * np.uint8(MOVE_BITS["l"])
+        masks[:, :-1] |= is_open[:, 1:] * np.uint8(MOVE_BITS["r"])
+        masks[~is_open] = 0
+
+        # Indexing a bytes object gives a plain int, which is much faster than indexing a numpy array.
+        self._flat_move_masks = masks.tobytes()
+        self.move_masks = np.frombuffer(self._flat_move_masks, dtype=np.uint8).reshape(np.shape(self.grid))
+        # For each mask, the (flat index offset, direction) pairs of its legal moves.
+        flat_offsets = dict(zip(MOVES, get_flat_offsets(self.cols)))
+        self._flat_steps_by_mask = tuple(tuple((flat_offsets[move], move) for move in moves) for moves in MOVES_BY_MASK)
 
     def get_legal_moves(self, r: int, c: int) -> list:
         """Given row and column coordinates to a position on self.grid, return a list of legal moves 'u', 'd', 'l', or
@@ -205,35 +380,16 @@ class Maze:
         if not isinstance(c, int):
             raise TypeError("c must be an int")
         # r out of bounds
-        if not (0 <= r < np.shape(self.grid)[0]):
+        if not (0 <= r < self.rows):
             raise IndexError("r is out of bounds")
         # c out of bounds
-        if not (0 <= c < np.shape(self.grid)[0]):
+        if not (0 <= c < self.cols):
             raise IndexError("c is out of bounds")
         # r, c points to a wall
         if self.grid[r, c] == 1:
             raise ValueError("coordinate pair (r, c) points to a wall. No moves possible")
 
-        output_moves = []
-
-        # Check for 'u'
-        if 0 <= r-1 < np.shape(self.grid)[0]:   # If in bounds:
-            if self.grid[r-1, c] != 1:    # If not a wall:
-                output_moves.append("u")
-        # Check for 'd'
-        if 0 <= r+1 < np.shape(self.grid)[0]:   # If in bounds:
-            if self.grid[r+1, c] != 1:    # If not a wall:
-                output_moves.append("d")
-        # Check for 'l'
-        if 0 <= c-1 < np.shape(self.grid)[0]:   # If in bounds:
-            if self.grid[r, c-1] != 1:    # If not a wall:
-                output_moves.append("l")
-        # Check for 'r'
-        if 0 <= c+1 < np.shape(self.grid)[0]:   # If in bounds:
-            if self.grid[r, c+1] != 1:    # If not a wall:
-                output_moves.append("r")
-
-        return output_moves
+        return list(MOVES_BY_MASK[self._flat_move_masks[r * self.cols + c]])
 
     def get_next_space(self, r: int, c: int, direction: str) -> list:
         """Given direction 'u', 'd', 'l', or 'r', return the coordinates of the next space.
@@ -247,10 +403,10 @@ class Maze:
         if not isinstance(c, int):
             raise TypeError("c must be an int")
         # r out of bounds
-        if not (0 <= r < np.shape(self.grid)[0]):
+        if not (0 <= r < self.rows):
             raise IndexError("r is out of bounds")
         # c out of bounds
-        if not (0 <= c < np.shape(self.grid)[0]):
+        if not (0 <= c < self.cols):
             raise IndexError("c is out of bounds")
         # r, c points to a wall
         if self.grid[r, c] == 1:
@@ -262,17 +418,11 @@ class Maze:
         if direction not in ["u", "d", "l", "r"]:
             raise ValueError("direction must be 'u', 'd', 'l', or 'r'")
         # direction not a valid move from r, c
-        if direction not in self.get_legal_moves(r, c):
+        if not self._flat_move_masks[r * self.cols + c] & MOVE_BITS[direction]:
             raise ValueError("direction not a legal move from (r, c)")
 
-        if direction == "u":
-            return [r-1, c]
-        elif direction == "d":
-            return [r+1, c]
-        elif direction == "l":
-            return [r, c-1]
-        else:   # direction must equal "r"
-            return [r, c+1]
+        (dr, dc) = MOVE_DELTAS[direction]
+        return [r + dr, c + dc]
 
     def is_winning_position(self, r: int, c: int) -> bool:
         """Given row and column coordinates to a position on self.grid, return whether it's a winning position.
@@ -285,20 +435,141 @@ class Maze:
         if not isinstance(c, int):
             raise TypeError("c must be an int")
         # r out of bounds
-        if not (0 <= r < np.shape(self.grid)[0]):
+        if not (0 <= r < self.rows):
+            raise IndexError("r is out of bounds")
+        # c out of bounds
+        if not (0 <= c < self.cols):
+            raise IndexError("c is out of bounds")
+
+        return r * self.cols + c == self._winning_index
+
+    #
+    # UNCHECKED FAST PATH
+    # These methods do no error handling, and assume that (r, c) or index is an in-bounds hall.  They are meant for
+    # solvers that need to call them millions of times.  A flat index is r * self.cols + c.
+    #
+    def get_legal_moves_unchecked(self, r: int, c: int) -> tuple:
+        """Return a tuple of the legal moves 'u', 'd', 'l', or 'r' from (r, c)."""
+        return MOVES_BY_MASK[self._flat_move_masks[r * self.cols + c]]
+
+    def get_next_space_unchecked(self, r: int, c: int, direction: str) -> tuple:
+        """Return the (r, c) coordinates reached by moving in direction from (r, c).  The move is assumed legal."""
+        (dr, dc) = MOVE_DELTAS[direction]
+        return (r + dr, c + dc)
+
+    def get_neighbors_unchecked(self, r: int, c: int) -> list:
+        """Return a list of (r, c, direction) tuples, one for each space reachable in one move from (r, c)."""
+        return [(r + MOVE_DELTAS[move][0], c + MOVE_DELTAS[move][1], move) for move in MOVES_BY_MASK[self._flat_move_masks[r * self.cols + c]]]
+
+    def get_flat_neighbors_unchecked(self, index: int) -> list:
+        """Return a list of (neighbor_index, direction) tuples, one for each space reachable in one move from the space
+        at flat index index.
+        """
+        return [(index + offset, move) for (offset, move) in self._flat_steps_by_mask[self._flat_move_masks[index]]]
+
+    def is_winning_index_unchecked(self, index: int) -> bool:
+        """Return whether the space at flat index index is the winning position."""
+        return index == self._winning_index
+
+    #
+    # DISTANCES TO THE GOAL
+    # The distance from every cell to the goal is computed once, the first time any of these methods needs it, and is
+    # kept until the grid changes.
+    #
+    def get_distances_to_goal(self) -> np.ndarray:
+        """Return a read-only int32 array shaped like self.grid, holding the number of moves needed to get from each
+        cell to the goal.  Walls, and halls from which the goal can't be reached, hold -1.
+        """
+        if self._distances_to_goal is None:
+            self._distances_to_goal = self._compute_distances_to_goal()
+            self._flat_distances_to_goal = memoryview(self._distances_to_goal.ravel())
+        return self._distances_to_goal
+
+    def distance(self, r: int, c: int) -> int:
+        """Return the number of moves in a shortest path from (r, c) to the goal, or -1 if there is none."""
+        # Handle errors
+        # r not int
+        if not isinstance(r, int):
+            raise TypeError("r must be an int")
+        # c not int
+        if not isinstance(c, int):
+            raise TypeError("c must be an int")
+        # r out of bounds
+        if not (0 <= r < self.rows):
             raise IndexError("r is out of bounds")
         # c out of bounds
-        if not (0 <= c < np.shape(self.grid)[0]):
+        if not (0 <= c < self.cols):
             raise IndexError("c is out of bounds")
+        # r, c points to a wall
+        if self.grid[r, c] == 1:
+            raise ValueError("coordinate pair (r, c) points to a wall")
 
-        return self.grid[r, c] == 2
+        self.get_distances_to_goal()
+        return self._flat_distances_to_goal[r * self.cols + c]
+
+    def optimal_length(self) -> int:
+        """Return the number of moves in a shortest path from the start to the goal, or -1 if there is none."""
+        return self.distance(self.rows - 1, 0)
+
+    def get_distance_unchecked(self, index: int) -> int:
+        """Return the distance from the hall at flat index index to the goal.  This is a perfect A* heuristic.
+        Like the other unchecked methods, this does no error handling.
+        """
+        if self._flat_distances_to_goal is None:
+            self.get_distances_to_goal()
+        return self._flat_distances_to_goal[index]
+
+    def _compute_distances_to_goal(self) -> np.ndarray:
+        """Run a breadth-first search outward from the goal, and return the distances array described in
+        get_distances_to_goal().  Each step of the search expands the whole wavefront at once with numpy.
+        """
+        # Work on a flat copy of the grid padded with a border of walls, so neighbors are plain offsets.
+        padded_width = self.cols + 2
+        is_open = np.zeros((self.rows + 2, padded_width), dtype=np.bool_)
+        is_open[1:-1, 1:-1] = self.grid != 1
+        is_open = is_open.ravel()
+        distances = np.full(len(is_open), -1, dtype=np.int32)
+        offsets = np.array([-padded_width, padded_width, -1, 1])
+
+        wavefront = np.array([(self.winning_position[0] + 1) * padded_width + self.winning_position[1] + 1])
+        distances[wavefront] = 0
+        distance = 0
+        while len(wavefront) > 0:
+            distance += 1
+            neighbors = (wavefront[:, np.newaxis] + offsets).ravel()
+            neighbors = np.unique(neighbors[is_open[neighbors] & (distances[neighbors] < 0)])
+            distances[neighbors] = distance
+            wavefront = neighbors
+
+        distances = distances.reshape(self.rows + 2, padded_width)[1:-1, 1:-1].copy()
+        distances.setflags(write=False)
+        return distances
+
+    def get_junction_graph(self):
+        """Return a junctions.JunctionGraph of this maze, which collapses each corridor into a single edge.  It is built
+        the first time it's asked for, and kept until the grid changes.
+        """
+        if self._junction_graph is None:
+            from junctions import JunctionGraph    # Imported here, so that mazes that don't use it start up faster
+            self._junction_graph = JunctionGraph(self)
+        return self._junction_graph
+
+    def get_tree_paths(self):
+        """Return a tree_paths.TreePaths of this maze, which answers shortest path and distance queries between any two
+        halls, in O(log n) time if the maze has no loops.  It is built the first time it's asked for, and kept until the
+        grid changes.
+        """
+        if self._tree_paths is None:
+            from tree_paths import TreePaths   # Imported here, so that mazes that don't use it start up faster
+            self._tree_paths = TreePaths(self)
+        return self._tree_paths
 
     def _get_winning_position(self) -> list:
-        """Return the numpy coordinates of the winning position in the maze."""
-        for rr in range(np.shape(self.grid)[0]):
-            for cc in range(np.shape(self.grid)[1]):
-                if self.grid[rr, cc] == 2:
-                    return [rr, cc]
+        """Return the numpy coordinates of the winning position in the maze, or None if it has none."""
+        goal = int(np.argmax(self.grid == 2))
+        if self.grid.flat[goal] != 2:
+            return None
+        return [goal // self.cols, goal % self.cols]
 
 
 class Zone:
@@ -310,3 +581,77 @@ class Zone:
         """
         self.ctl = ctl
         self.cbr = cbr
+
+
+def get_flat_offsets(cols: int) -> tuple:
+    """Return the change in flat index r * cols + c that each move in MOVES makes, in a maze cols wide."""
+    return tuple(MOVE_DELTAS[move][0] * cols + MOVE_DELTAS[move][1] for move in MOVES)
+
+
+def generate_mazes(count: int, size=20, base_seed: int = 0, workers: int = None, algorithm: str = "prims",
+                   max_cost: int = None):
+    """Generate count mazes, spread across a pool of worker processes, and yield them in order as they finish.
+    size is either an int, for square mazes, or a (rows, cols) pair.
+    Maze number index is built with seed maze_seed(base_seed, index), so it is the same no matter how many workers are
+    used, and can be rebuilt on its own with Maze(rows, cols, seed=maze_seed(base_seed, index)).
+    workers is the number of processes to use.  If it is None, one process per CPU is used.  If it is 1, the mazes are
+    generated in this process.
+    algorithm and max_cost are passed on to Maze().
+    """
+    # Handle errors
+    # count not int
+    if not isinstance(count, int):
+        raise TypeError("count must be an int")
+    # count negative
+    if count < 0:
+        raise ValueError("count must not be negative")
+    # size not an int or a pair of ints
+    if isinstance(size, int):
+        (rows, cols) = (size, size)
+    elif isinstance(size, (tuple, list)) and len(size) == 2:
+        (rows, cols) = size
+    else:
+        raise TypeError("size must be an int or a (rows, cols) pair")
+    # base_seed not int
+    if not isinstance(base_seed, int):
+        raise TypeError("base_seed must be an int")
+    # workers not int
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not isinstance(workers, int):
+        raise TypeError("workers must be an int")
+    # workers not positive
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    # algorithm unknown
+    if algorithm not in GENERATORS:
+        raise ValueError(f"algorithm must be one of {', '.join(sorted(GENERATORS))}")
+
+    if workers == 1:
+        for index in range(count):
+            yield Maze(rows, cols, seed=maze_seed(base_seed, index), algorithm=algorithm, max_cost=max_cost)
+        return
+
+    import concurrent.futures  # Imported here, so that mazes built in this process don't pay for it
+
+    # Keep a bounded number of mazes in flight, so that a slow consumer doesn't pile up finished mazes in memory.
+    max_in_flight = 2 * workers
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = collections.deque()
+        next_index = 0
+        try:
+            while next_index < count or in_flight:
+                while next_index < count and len(in_flight) < max_in_flight:
+                    in_flight.append(executor.submit(Maze, rows, cols, maze_seed(base_seed, next_index), algorithm,
+                                                     max_cost))
+                    next_index += 1
+                yield in_flight.popleft().result()
+        finally:
+            # If the caller stops early, don't generate mazes nobody will ask for.
+            for future in in_flight:
+                future.cancel()
+
+
+def maze_seed(base_seed: int, index: int) -> np.random.SeedSequence:
+    """Return the seed of maze number index in a batch generated by generate_mazes() from base_seed."""
+    return np.random.SeedSequence(base_seed, spawn_key=(index,))
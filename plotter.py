@@ -2,14 +2,29 @@
 
 
 from maze import Maze
-import tkinter
+import functools
+import sys
 import numpy as np
-import ctypes
-windows_scale_factor = ctypes.windll.shcore.GetScaleFactorForDevice(0) / 100
+
+
+@functools.lru_cache(maxsize=None)
+def get_windows_scale_factor() -> float:
+    """Return the display scale factor that Windows applies to this program, such as 1.5 for 150%.  Return 1 on other
+    platforms, or if it can't be looked up.  The lookup is only done the first time this is called.
+    """
+    if sys.platform != "win32":
+        return 1.0
+    import ctypes
+    try:
+        return ctypes.windll.shcore.GetScaleFactorForDevice(0) / 100
+    except (AttributeError, OSError):
+        return 1.0
 
 
 def plot_directions(maze, directions: list) -> None:
     """Show the user's directions on a plot of the maze."""
+    import tkinter     # Imported here, so that prepare_drawing() can be used without paying for tkinter
+
     # Handle errors
     # maze not a Maze object
     if not isinstance(maze, Maze):
@@ -26,11 +41,15 @@ def plot_directions(maze, directions: list) -> None:
         if element not in ["u", "d", "l", "r"]:
             raise ValueError("directions contains an element that is not 'u', 'd', 'l', or 'r'")
 
+    windows_scale_factor = get_windows_scale_factor()
+    maze_height = np.shape(maze.grid)[0] * maze.cell_length    # pixels
+    maze_width = np.shape(maze.grid)[1] * maze.cell_length     # pixels
+
     window = tkinter.Tk()
     window.title("Directions through maze")
-    window.geometry(f"{int(800/windows_scale_factor)}x{int(830/windows_scale_factor)}")
+    window.geometry(f"{int(maze_width/windows_scale_factor)}x{int((maze_height + 30)/windows_scale_factor)}")
     window["background"] = "#2B2B2B"
-    canvas = tkinter.Canvas(window, width=int(800/windows_scale_factor), height=int(800/windows_scale_factor), background="#CCCCCC")    # #A33DB8 is also nice
+    canvas = tkinter.Canvas(window, width=int(maze_width/windows_scale_factor), height=int(maze_height/windows_scale_factor), background="#CCCCCC")    # #A33DB8 is also nice
     canvas.grid(row=0, column=0)
     window.after(500, lambda: draw(maze, directions, canvas))
     window.mainloop()
@@ -38,17 +57,58 @@ def plot_directions(maze, directions: list) -> None:
 
 def draw(maze, directions: list, canvas) -> None:
     """Draw to the canvas.  This function is called by plot_directions()"""
-    def physics_coords_to_tkinter_coords(physics_coords):
-        """Converts from the physics coordinate system to the tkinter canvas coordinate system.
-        physics_coords is a list of 2 floats.
+    import tkinter
+
+    # Handle errors
+    # canvas not a Canvas object
+    if not isinstance(canvas, tkinter.Canvas):
+        raise TypeError("canvas must be a tkinter.Canvas object")
+
+    drawing = prepare_drawing(maze, directions)
+    wall_color = "#2B2B2B"
+
+    # Wipe old contents of canvas.
+    canvas.delete("all")
+
+    # Draw the walls of the maze to the canvas.
+    for rectangle in drawing["walls"]:
+        canvas.create_rectangle(*rectangle, outline=wall_color, fill=wall_color)
+
+    # Draw the goal of the maze to the canvas.
+    canvas.create_rectangle(*drawing["goal"], fill="green")
+
+    # Draw the user's path
+    for line in drawing["lines"]:
+        canvas.create_line(*line, fill="cyan")
+    for oval in drawing["dots"]:
+        canvas.create_oval(*oval, fill="cyan")
+
+    # Update the canvas.
+    canvas.update()
+
+
+def prepare_drawing(maze, directions: list) -> dict:
+    """Compute, in tkinter canvas coordinates, everything that draw() puts on the canvas.
+    Returns a dict with these keys, each holding [x0, y0, x1, y1] lists:
+    "walls" is a list of wall rectangles, "goal" is the goal rectangle, "dots" is a list of ovals marking the start and
+    every position on the path, and "lines" is a list of lines between consecutive positions.
+    """
+    def cells_to_tkinter_rectangle(r0: int, c0: int, r1: int, c1: int) -> list:
+        """Returns the rectangle covering rows r0 to r1 - 1 and columns c0 to c1 - 1 of the maze, in tkinter canvas
+        coordinates.
         """
-        return [int(physics_coords[1]/windows_scale_factor), int((800 - physics_coords[0])/windows_scale_factor)]
+        return [int((c1*cell_length - 1)/windows_scale_factor), int((r1*cell_length - 1)/windows_scale_factor),
+                int(c0*cell_length/windows_scale_factor), int(r0*cell_length/windows_scale_factor)]
 
     def numpy_coords_to_tkinter_coords(numpy_coords: list) -> list:
         """Converts from numpy cell coordinates to the tkinter canvas coordinate system, pointing at the center of a
         cell"""
         r, c = numpy_coords[0], numpy_coords[1]
-        return [int((40*c + 20)/windows_scale_factor), int((40*r + 20)/windows_scale_factor)]
+        return [int((cell_length*c + cell_length/2)/windows_scale_factor), int((cell_length*r + cell_length/2)/windows_scale_factor)]
+
+    def dot_around(dot_center: list) -> list:
+        """Returns the bounding box of a dot centered on dot_center, in tkinter canvas coordinates."""
+        return [dot_center[0] - dot_radius, dot_center[1] - dot_radius, dot_center[0] + dot_radius, dot_center[1] + dot_radius]
 
     # Handle errors
     # maze not a Maze object
@@ -65,41 +125,26 @@ def draw(maze, directions: list, canvas) -> None:
     for element in directions:
         if element not in ["u", "d", "l", "r"]:
             raise ValueError("directions contains an element that is not 'u', 'd', 'l', or 'r'")
-    # canvas not a Canvas object
-    if not isinstance(canvas, tkinter.Canvas):
-        raise TypeError("canvas must be a tkinter.Canvas object")
-
-    wall_color = "#2B2B2B"
 
-    # Wipe old contents of canvas.
-    canvas.delete("all")
+    windows_scale_factor = get_windows_scale_factor()
+    cell_length = maze.cell_length     # pixels
+    dot_radius = 8/windows_scale_factor  # pixels
 
-    # Draw the walls of the maze to the canvas.
-    for wall in maze._walls:
-        this_ctl_in_tk_coords = physics_coords_to_tkinter_coords(wall.ctl)
-        this_cbr_in_tk_coords = physics_coords_to_tkinter_coords(wall.cbr)
-        canvas.create_rectangle(this_ctl_in_tk_coords[0], this_ctl_in_tk_coords[1], this_cbr_in_tk_coords[0],
-                                     this_cbr_in_tk_coords[1], outline=wall_color, fill=wall_color)
+    # The walls of the maze, as merged rectangles of wall cells.
+    walls = [cells_to_tkinter_rectangle(*rectangle) for rectangle in maze.get_wall_rectangles().tolist()]
 
-    # Draw the goal of the maze to the canvas.
-    goal_ctl_in_tk_coords = physics_coords_to_tkinter_coords(maze._goal.ctl)
-    goal_cbr_in_tk_coords = physics_coords_to_tkinter_coords(maze._goal.cbr)
-    canvas.create_rectangle(goal_ctl_in_tk_coords[0], goal_ctl_in_tk_coords[1], goal_cbr_in_tk_coords[0],
-                                 goal_cbr_in_tk_coords[1], fill="green")
+    # The goal of the maze.
+    (goal_r, goal_c) = maze.winning_position
+    goal = cells_to_tkinter_rectangle(goal_r, goal_c, goal_r + 1, goal_c + 1)
 
-    # Draw a dot at starting position
+    # A dot at starting position
     current_cell_coords = [np.shape(maze.grid)[0] - 1, 0]  # numpy coordinates
-    dot_center = numpy_coords_to_tkinter_coords(current_cell_coords)
-    dot_radius = 8/windows_scale_factor  # pixels
-    canvas.create_oval(dot_center[0] - dot_radius, dot_center[1] - dot_radius, dot_center[0] + dot_radius, dot_center[1] + dot_radius, fill="cyan")
+    dots = [dot_around(numpy_coords_to_tkinter_coords(current_cell_coords))]
+    lines = []
 
-    # Draw the user's path
+    # The user's path
     for step in directions:
-        # Draw a dot at new position
-        dot_center = numpy_coords_to_tkinter_coords(current_cell_coords)
-        dot_radius = 8/windows_scale_factor  # pixels
-        canvas.create_oval(dot_center[0] - dot_radius, dot_center[1] - dot_radius, dot_center[0] + dot_radius, dot_center[1] + dot_radius, fill="cyan")
-        # Draw a line to next position
+        # A line to next position
         if step == "u":
             new_cell_coords = [current_cell_coords[0]-1, current_cell_coords[1]]
         elif step == "d":
@@ -108,15 +153,12 @@ def draw(maze, directions: list, canvas) -> None:
             new_cell_coords = [current_cell_coords[0], current_cell_coords[1]-1]
         else:   # step == "r"
             new_cell_coords = [current_cell_coords[0], current_cell_coords[1]+1]
-        line_start = dot_center.copy()
+        line_start = numpy_coords_to_tkinter_coords(current_cell_coords)
         line_end = numpy_coords_to_tkinter_coords(new_cell_coords)
-        canvas.create_line(line_start[0], line_start[1], line_end[0], line_end[1], fill="cyan")
-        # Draw a dot at new position
-        dot_center = numpy_coords_to_tkinter_coords(new_cell_coords)
-        dot_radius = 8/windows_scale_factor  # pixels
-        canvas.create_oval(dot_center[0] - dot_radius, dot_center[1] - dot_radius, dot_center[0] + dot_radius, dot_center[1] + dot_radius, fill="cyan")
+        lines.append([line_start[0], line_start[1], line_end[0], line_end[1]])
+        # A dot at new position
+        dots.append(dot_around(line_end))
         # Update current_cell_coords
-        current_cell_coords = new_cell_coords.copy()
+        current_cell_coords = new_cell_coords
 
-    # Update the canvas.
-    canvas.update()
+    return {"walls": walls, "goal": goal, "dots": dots, "lines": lines}
@@ -0,0 +1,147 @@
+"""Headless rendering of a maze and a list of directions into an image, without tkinter or a display.
+Everything is done with whole-array numpy operations, so it is fast enough to render large numbers of solutions.
+"""
+
+
+import struct
+import zlib
+import numpy as np
+from maze import MOVE_DELTAS, MOVES
+
+
+#
+# CONSTANTS
+#
+# RGB colors, matching the tkinter plotter.
+HALL_COLOR = (0xCC, 0xCC, 0xCC)
+WALL_COLOR = (0x2B, 0x2B, 0x2B)
+GOAL_COLOR = (0x00, 0x80, 0x00)
+PATH_COLOR = (0x00, 0xFF, 0xFF)
+ILLEGAL_PATH_COLOR = (0xFF, 0x00, 0x00)   # Path steps that land on a wall
+CELL_COLORS = np.array([HALL_COLOR, WALL_COLOR, GOAL_COLOR, HALL_COLOR], dtype=np.uint8)  # Indexed by grid value
+
+# Change in (row, column) for each direction, indexed by the direction's character code.
+_STEP_DELTAS = np.zeros((256, 2), dtype=np.int64)
+_STEP_DELTAS[[ord(move) for move in MOVES]] = [MOVE_DELTAS[move] for move in MOVES]
+_IS_VALID_STEP = np.zeros(256, dtype=np.bool_)
+_IS_VALID_STEP[[ord(move) for move in MOVES]] = True
+
+
+#
+# HELPER FUNCTIONS
+#
+def render(maze, directions: list = None, cell_pixels: int = 4) -> np.ndarray:
+    """Return an RGB image of maze, with the path given by directions drawn on it, as a uint8 array of shape
+    (rows * cell_pixels, cols * cell_pixels, 3).
+    Each cell becomes a cell_pixels x cell_pixels square.  Cells visited by the path, including the start, are colored
+    PATH_COLOR, or ILLEGAL_PATH_COLOR if they are walls.  Steps that leave the maze are not drawn.
+    """
+    # Handle errors
+    # cell_pixels not int
+    if not isinstance(cell_pixels, int):
+        raise TypeError("cell_pixels must be an int")
+    # cell_pixels not positive
+    if cell_pixels < 1:
+        raise ValueError("cell_pixels must be at least 1")
+
+    grid = maze.grid
+    (rows, cols) = np.shape(grid)
+    cells = CELL_COLORS[grid]
+
+    if directions is not None:
+        positions = get_path_positions(directions, (rows - 1, 0))
+        is_inside = (positions[:, 0] >= 0) & (positions[:, 0] < rows) & (positions[:, 1] >= 0) & (positions[:, 1] < cols)
+        positions = positions[is_inside]
+        path_rows = positions[:, 0]
+        path_cols = positions[:, 1]
+        on_wall = grid[path_rows, path_cols] == 1
+        cells[path_rows, path_cols] = PATH_COLOR
+        cells[path_rows[on_wall], path_cols[on_wall]] = ILLEGAL_PATH_COLOR
+        # Keep the goal visible under the path.
+        on_goal = grid[path_rows, path_cols] == 2
+        cells[path_rows[on_goal], path_cols[on_goal]] = GOAL_COLOR
+
+    if cell_pixels == 1:
+        return cells
+    return np.repeat(np.repeat(cells, cell_pixels, axis=0), cell_pixels, axis=1)
+
+
+def get_path_positions(directions: list, start: tuple) -> np.ndarray:
+    """Return an (len(directions) + 1) x 2 int array of the (row, column) positions visited by following directions from
+    start, starting with start itself.
+    """
+    # Handle errors
+    # directions not a list
+    if not isinstance(directions, list):
+        raise TypeError("directions must be a list")
+    try:
+        codes = np.frombuffer("".join(directions).encode("ascii"), dtype=np.uint8)
+    except TypeError:
+        raise TypeError("directions contains non-string element") from None
+    except UnicodeEncodeError:
+        raise ValueError("directions contains an element that is not 'u', 'd', 'l', or 'r'") from None
+    # directions contains an element that is not u/d/l/r (this also catches multi-character elements)
+    if len(codes) != len(directions) or not np.all(_IS_VALID_STEP[codes]):
+        raise ValueError("directions contains an element that is not 'u', 'd', 'l', or 'r'")
+
+    positions = np.empty((len(codes) + 1, 2), dtype=np.int64)
+    positions[0] = start
+    np.cumsum(_STEP_DELTAS[codes], axis=0, out=positions[1:])
+    positions[1:] += positions[0]
+    return positions
+
+
+def save_image(path: str, image: np.ndarray) -> None:
+    """Write image, an RGB uint8 array of shape (height, width, 3), to path.  The format is chosen by the extension
+    of path, which must be .png or .ppm.
+    """
+    lower_path = str(path).lower()
+    if lower_path.endswith(".png"):
+        data = encode_png(image)
+    elif lower_path.endswith(".ppm"):
+        data = encode_ppm(image)
+    else:
+        raise ValueError("path must end in .png or .ppm")
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def render_to_file(path: str, maze, directions: list = None, cell_pixels: int = 4) -> None:
+    """Render maze and directions with render(), and write the image to path with save_image()."""
+    save_image(path, render(maze, directions, cell_pixels))
+
+
+def encode_ppm(image: np.ndarray) -> bytes:
+    """Return image, an RGB uint8 array of shape (height, width, 3), encoded as a binary PPM file."""
+    _check_image(image)
+    (height, width) = np.shape(image)[:2]
+    return f"P6\n{width} {height}\n255\n".encode("ascii") + np.ascontiguousarray(image).tobytes()
+
+
+def encode_png(image: np.ndarray, compression_level: int = 6) -> bytes:
+    """Return image, an RGB uint8 array of shape (height, width, 3), encoded as a PNG file."""
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        """Returns a PNG chunk, with its length and CRC."""
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+    _check_image(image)
+    (height, width) = np.shape(image)[:2]
+    # Each scanline starts with a filter type byte.  0 means no filter.
+    scanlines = np.zeros((height, 1 + 3 * width), dtype=np.uint8)
+    scanlines[:, 1:] = np.reshape(image, (height, 3 * width))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)     # 8-bit RGB, no interlacing
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(scanlines.tobytes(), compression_level))
+            + chunk(b"IEND", b""))
+
+
+def _check_image(image) -> None:
+    """Raises an error if image is not an RGB uint8 array of shape (height, width, 3)."""
+    # image not an ndarray
+    if not isinstance(image, np.ndarray):
+        raise TypeError("image must be a numpy array")
+    # image not uint8
+    if image.dtype != np.uint8:
+        raise TypeError("image must have dtype uint8")
+    # image not (height, width, 3)
+    if image.ndim != 3 or np.shape(image)[2] != 3:
+        raise ValueError("image must have shape (height, width, 3)")
@@ -0,0 +1,73 @@
+"""Fast A* solver, used as the reference answer when grading.  It returns the same kind of direction list as
+example_solution_pathfinder.get_directions(), but is written for speed on large mazes rather than for teaching.
+"""
+
+
+import heapq
+import numpy as np
+from maze import MOVES, MOVES_BY_MASK, get_flat_offsets
+
+
+#
+# HELPER FUNCTIONS
+#
+def get_directions(maze) -> list:
+    """Given a Maze object, return a list of directions to perform in order to get from the bottom-left corner
+    (marked 3) to the exit (marked 2), using the A* search algorithm with a Manhattan distance heuristic.
+    Each element of the list returned is "u", "d", "l", or "r".
+
+    States are flat indices r * cols + c.  The closed set is a numpy bitmap, and each reached cell stores only the
+    move used to reach it, so the path is rebuilt once at the end instead of being copied at every step.
+    """
+    (rows, cols) = np.shape(maze.grid)
+    start = (rows - 1) * cols
+    (goal_r, goal_c) = maze.winning_position
+    goal = goal_r * cols + goal_c
+
+    # For each 4-bit move mask, the (flat index offset, move number) pairs of its legal moves.
+    offsets = get_flat_offsets(cols)
+    steps_by_mask = [[(offsets[MOVES.index(move)], MOVES.index(move)) for move in moves] for moves in MOVES_BY_MASK]
+    masks = maze.move_masks.tobytes()    # Indexing bytes gives plain ints, which is much faster than numpy indexing.
+
+    # memoryviews of the numpy arrays give fast scalar reads and writes that go straight to the arrays' buffers.
+    closed_array = np.zeros(rows * cols, dtype=np.bool_)
+    closed = memoryview(closed_array)
+    parent_move_array = np.zeros(rows * cols, dtype=np.uint8)   # Move number used to reach each cell
+    parent_move = memoryview(parent_move_array)
+    g_array = np.full(rows * cols, -1, dtype=np.int64)   # Best known cost of each cell, or -1 if not reached yet
+    g = memoryview(g_array)
+
+    # The fringe holds (f, h, index) tuples.  Ties on f go to the state closest to the goal.
+    g[start] = 0
+    fringe = [(abs(goal_r - rows + 1) + goal_c, abs(goal_r - rows + 1) + goal_c, start)]
+
+    # Run A*
+    while fringe:
+        (_, _, index) = heapq.heappop(fringe)
+        if closed[index]:
+            continue
+        if index == goal:
+            break
+        closed[index] = True
+        new_g = g[index] + 1
+        for (offset, move_number) in steps_by_mask[masks[index]]:
+            neighbor = index + offset
+            if closed[neighbor] or 0 <= g[neighbor] <= new_g:
+                continue
+            g[neighbor] = new_g
+            parent_move[neighbor] = move_number
+            (neighbor_r, neighbor_c) = divmod(neighbor, cols)
+            h = abs(goal_r - neighbor_r) + abs(goal_c - neighbor_c)
+            heapq.heappush(fringe, (new_g + h, h, neighbor))
+    else:
+        raise RuntimeError("There is no path from the start to the goal")
+
+    # Walk the parent moves back from the goal to rebuild the path.
+    directions = []
+    index = goal
+    while index != start:
+        move_number = parent_move[index]
+        directions.append(MOVES[move_number])
+        index -= offsets[move_number]
+    directions.reverse()
+    return directions
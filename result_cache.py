@@ -0,0 +1,198 @@
+"""Content-addressed cache of solver results, so that re-grading only re-runs what changed.
+
+A result is stored under a key made from a hash of the solver's source file and a hash of the maze's grid, so a cached
+result is found again no matter which path the solver has or which corpus the maze is in, and is never found once
+either one changes.  ResultCache keeps recently used results in memory, up to a size bound, in front of an optional
+directory of JSON files that persists between runs and evicts its least recently used files past its own size bound.
+
+Only the solver's own file is hashed.  A solver that imports helper modules of its own, or that behaves randomly,
+should be graded without a cache.
+"""
+
+
+import collections
+import hashlib
+import json
+import os
+import numpy as np
+
+
+#
+# CONSTANTS
+#
+KEY_VERSION = 2     # Part of every key.  Bump it when the results of grading change, so that old results are not used
+DEFAULT_MEMORY_BYTES = 64 * 2**20
+DEFAULT_DISK_BYTES = 1024 * 2**20
+
+
+#
+# CLASSES
+#
+class ResultCache:
+    """Two-tier least-recently-used cache of (result, directions) pairs, keyed by make_key().
+    result is a JSON-compatible dict, and directions is a list of 'u'/'d'/'l'/'r' directions or None.
+    Each entry is kept as JSON text, and its size is the length of that text, so every get() returns fresh copies that
+    the caller may change.
+    """
+
+    def __init__(self, directory=None, memory_bytes: int = DEFAULT_MEMORY_BYTES, disk_bytes: int = DEFAULT_DISK_BYTES):
+        """directory is the directory for the on-disk tier, created if needed, or None to only cache in memory.
+        memory_bytes and disk_bytes bound the total size of the entries in each tier.  An entry bigger than a tier's
+        bound is not kept in that tier.
+        """
+        # Handle errors
+        # memory_bytes not a non-negative int
+        if not isinstance(memory_bytes, int) or memory_bytes < 0:
+            raise ValueError("memory_bytes must be a non-negative int")
+        # disk_bytes not a non-negative int
+        if not isinstance(disk_bytes, int) or disk_bytes < 0:
+            raise ValueError("disk_bytes must be a non-negative int")
+
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = collections.OrderedDict()    # Maps key to JSON text, least recently used first
+        self._memory_size = 0
+        self._disk = collections.OrderedDict()  # Maps key to file size, least recently used first
+        self._disk_size = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._scan_disk()
+
+    def __len__(self) -> int:
+        """Return the number of distinct entries in either tier."""
+        return len(self._memory.keys() | self._disk.keys())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory or key in self._disk
+
+    def get(self, key: str):
+        """Return the (result, directions) pair stored under key, or None if there is none."""
+        text = self._memory.get(key)
+        if text is not None:
+            self._memory.move_to_end(key)
+        elif key in self._disk:
+            path = self._get_path(key)
+            try:
+                with open(path, encoding="utf-8") as file:
+                    text = file.read()
+                os.utime(path)  # The file's modification time orders the files by use the next time they are scanned
+            except OSError:     # Removed by someone else
+                self._forget_file(key)
+            else:
+                self._disk.move_to_end(key)
+                self._remember(key, text)
+        if text is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry = json.loads(text)
+        directions = entry["directions"]
+        if isinstance(directions, str):
+            directions = list(directions)
+        return entry["result"], directions
+
+    def put(self, key: str, result: dict, directions: list = None) -> None:
+        """Store result and directions under key, in both tiers."""
+        if directions is not None and all(isinstance(direction, str) and len(direction) == 1 for direction in directions):
+            directions = "".join(directions)    # 1 byte per move, instead of 5 as a JSON list
+        text = json.dumps({"result": result, "directions": directions})
+        self._remember(key, text)
+        if self.directory is None:
+            return
+        if len(text) > self.disk_bytes:
+            self._forget_file(key)
+            return
+
+        # Write to a temporary file and then rename it, so that a reader never sees half a file.
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temporary_path, path)
+        self._forget_file(key, remove=False)
+        self._disk[key] = len(text)
+        self._disk_size += len(text)
+        while self._disk_size > self.disk_bytes:
+            self._forget_file(next(iter(self._disk)))
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        self._memory.clear()
+        self._memory_size = 0
+        for key in list(self._disk):
+            self._forget_file(key)
+
+    def _remember(self, key: str, text: str) -> None:
+        """Put text in the memory tier under key, evicting the least recently used entries to make room."""
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        if len(text) > self.memory_bytes:
+            return
+        self._memory[key] = text
+        self._memory_size += len(text)
+        while self._memory_size > self.memory_bytes:
+            (_, evicted) = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _get_path(self, key: str) -> str:
+        """Return the path of the file for key.  Files are spread over subdirectories named by the first 2 characters
+        of their keys, so that no directory gets too big.
+        """
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _forget_file(self, key: str, remove: bool = True) -> None:
+        """Drop key from the disk tier, and delete its file if remove is True."""
+        size = self._disk.pop(key, None)
+        if size is None:
+            return
+        self._disk_size -= size
+        if remove:
+            try:
+                os.remove(self._get_path(key))
+            except OSError:
+                pass
+
+    def _scan_disk(self) -> None:
+        """Find the files already in the directory, oldest first, and evict the oldest if they are over the bound."""
+        found = []
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir():
+                continue
+            for entry in os.scandir(subdirectory.path):
+                if entry.name.endswith(".json"):
+                    status = entry.stat()
+                    found.append((status.st_mtime, entry.name[:-len(".json")], status.st_size))
+        for (_, key, size) in sorted(found):
+            self._disk[key] = size
+            self._disk_size += size
+        while self._disk_size > self.disk_bytes:
+            self._forget_file(next(iter(self._disk)))
+
+
+#
+# HELPER FUNCTIONS
+#
+def hash_grid(grid: np.ndarray) -> str:
+    """Return the hex SHA-256 hash of a maze grid's shape and bytes."""
+    grid = np.ascontiguousarray(grid, dtype=np.uint8)
+    digest = hashlib.sha256(np.array(np.shape(grid), dtype="<u8").tobytes())
+    digest.update(grid.data)
+    return digest.hexdigest()
+
+
+def hash_solver_source(path) -> str:
+    """Return the hex SHA-256 hash of the contents of the solver file at path."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(solver_hash: str, grid_hash: str) -> str:
+    """Return the cache key for a solver and a maze, from hash_solver_source() and hash_grid()."""
+    return hashlib.sha256(f"{KEY_VERSION}:{solver_hash}:{grid_hash}".encode("ascii")).hexdigest()
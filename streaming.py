@@ -0,0 +1,251 @@
+"""Out-of-core generation of mazes too big to fit in memory.
+
+write_streamed_maze() builds a maze with Eller's algorithm, which only ever needs to know about one row of cells at a
+time, and writes it into a disk-backed .npy file one band of rows at a time.  Its memory use grows with the width of
+the maze but not with its height, so mazes of 50000x50000 cells (2.5 GB on disk) and larger can be built.
+StreamedMaze opens such a file as a Maze whose grid is a read-only numpy.memmap.
+
+Cells of the maze sit at even columns, and at every second row counting up from the bottom, so the start is always one
+of them.  Every cell is reachable from every other cell in exactly one way: unlike the Prim's mazes, these have no
+loops.  If rows or cols is even, the top row or the right-hand column is left as solid wall.
+"""
+
+
+import numpy as np
+import random
+from generators import spanning_forest
+from maze import MOVE_BITS, MOVES, MOVES_BY_MASK, Maze, get_flat_offsets
+
+
+#
+# CONSTANTS
+#
+JOIN_PROBABILITY = 0.5  # Chance that Eller's algorithm joins two side-by-side cells of different sets
+DOWN_PROBABILITY = 0.5  # Chance that a cell gets a passage to the row below, apart from the one each set must have
+DEFAULT_BAND_ROWS = 64  # Rows of the grid that are built in memory before being written out
+
+
+#
+# HELPER FUNCTIONS
+#
+def write_streamed_maze(path, rows: int, cols: int, seed=None, band_rows: int = DEFAULT_BAND_ROWS) -> list:
+    """Generate a rows x cols maze with Eller's algorithm and write its grid to the .npy file at path, band_rows rows
+    at a time.  Returns the [r, c] position of the goal.
+    The goal is the hall farthest from the start, by straight-line distance, and the first such hall in row-major order,
+    just as for Maze.  It is found during the same pass, so the grid is never read back.
+    seed is used as in Maze().
+    """
+    # Handle errors
+    # rows not int
+    if not isinstance(rows, int):
+        raise TypeError("rows must be an int")
+    # cols not int
+    if not isinstance(cols, int):
+        raise TypeError("cols must be an int")
+    # rows too small
+    if rows < 2:
+        raise ValueError("rows must be at least 2")
+    # cols too small
+    if cols < 2:
+        raise ValueError("cols must be at least 2")
+    # maze too small to have a goal apart from the start
+    if rows < 3 and cols < 3:
+        raise ValueError("rows or cols must be at least 3")
+    # band_rows not a positive int
+    if not isinstance(band_rows, int) or band_rows < 1:
+        raise ValueError("band_rows must be a positive int")
+
+    if seed is None:
+        seed = random.getrandbits(64)
+    rng = np.random.default_rng(seed)
+    grid = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(rows, cols))
+
+    cell_count = (cols + 1) // 2    # Cells per row of cells
+    cell_row_count = (rows + 1) // 2
+    band = np.ones((band_rows, cols), dtype=np.uint8)
+    band_start = 0  # Grid row of band[0]
+    band_fill = 0   # Rows of band filled so far
+    (goal_r, goal_c) = (rows - 1, 0)
+    goal_distance = 0   # Squared distance from the start to (goal_r, goal_c)
+
+    def emit(row: np.ndarray) -> None:
+        """Append row to the grid, writing out the band when it is full."""
+        nonlocal band_start, band_fill, goal_r, goal_c, goal_distance
+        band[band_fill] = row
+        band_fill += 1
+        if band_fill == band_rows or band_start + band_fill == rows:
+            # Look for a hall farther from the start than the goal so far.  Bands come in row-major order, so only a
+            # strictly greater distance can move the goal.
+            band_rows_numbers = np.arange(band_start, band_start + band_fill, dtype=np.int64)
+            distances = (rows - 1 - band_rows_numbers)[:, np.newaxis] ** 2 + np.arange(cols, dtype=np.int64) ** 2
+            distances[band[:band_fill] != 0] = -1
+            best = int(np.argmax(distances))
+            if distances.flat[best] > goal_distance:
+                goal_distance = int(distances.flat[best])
+                (goal_r, goal_c) = (band_start + best // cols, best % cols)
+
+            grid[band_start:band_start + band_fill] = band[:band_fill]
+            grid.flush()
+            band_start += band_fill
+            band_fill = 0
+
+    # The top row is solid wall if the cells' rows don't reach it.
+    wall_row = np.ones(cols, dtype=np.uint8)
+    if rows % 2 == 0:
+        emit(wall_row)
+
+    # Eller's algorithm, one row of cells at a time, top to bottom.  sets[j] is the set of cell j of the current row;
+    # cells in the same set are already joined by some path through the rows above.
+    sets = np.arange(cell_count)
+    set_count = cell_count
+    for cell_row in range(cell_row_count):
+        is_last = cell_row == cell_row_count - 1
+
+        # Join some side-by-side cells of different sets.  In the last row, join every such pair, so that the whole
+        # maze ends up as one set.
+        if is_last:
+            is_candidate = sets[:-1] != sets[1:]
+        else:
+            is_candidate = (sets[:-1] != sets[1:]) & (rng.random(cell_count - 1) < JOIN_PROBABILITY)
+        candidates = np.flatnonzero(is_candidate)
+        (is_joined, roots) = spanning_forest(sets[candidates], sets[candidates + 1], set_count)
+        sets = roots[sets]
+
+        row = wall_row.copy()
+        row[0::2] = 0
+        row[2 * candidates[is_joined] + 1] = 0
+        emit(row)
+        if is_last:
+            break
+
+        # Give every set at least one passage down, and give each other cell a passage down at random.
+        is_down = rng.random(cell_count) < DOWN_PROBABILITY
+        has_down = np.zeros(set_count, dtype=np.bool_)
+        has_down[sets[is_down]] = True
+        by_set = np.lexsort((rng.random(cell_count), sets))     # Cells grouped by set, in random order within each set
+        is_first = np.ones(cell_count, dtype=np.bool_)
+        is_first[1:] = sets[by_set[1:]] != sets[by_set[:-1]]
+        chosen = by_set[is_first]   # One random cell of each set
+        is_down[chosen[~has_down[sets[chosen]]]] = True
+
+        row = wall_row.copy()
+        row[0::2][is_down] = 0
+        emit(row)
+
+        # Cells below a passage stay in the set above.  The others each start a new set.
+        sets = np.where(is_down, sets, set_count + np.arange(cell_count))
+        (_, sets) = np.unique(sets, return_inverse=True)
+        set_count = int(sets.max()) + 1
+
+    # Mark the goal and the start.
+    grid[goal_r, goal_c] = 2
+    grid[rows - 1, 0] = 3
+    grid.flush()
+    del grid
+    return [goal_r, goal_c]
+
+
+def generate_streamed_maze(path, rows: int, cols: int, seed=None, band_rows: int = DEFAULT_BAND_ROWS):
+    """Write a maze to path with write_streamed_maze(), and return it opened as a StreamedMaze."""
+    winning_position = write_streamed_maze(path, rows, cols, seed, band_rows)
+    return StreamedMaze(path, seed=seed, winning_position=winning_position)
+
+
+#
+# CLASSES
+#
+class StreamedMaze(Maze):
+    """A Maze whose grid is a read-only numpy.memmap of a .npy file, such as one written by write_streamed_maze().
+    Opening it reads almost nothing, and the moves of each cell are worked out from the grid when they are asked for,
+    instead of being precomputed for the whole maze.  The rest of Maze works too, but anything that covers the whole
+    maze, such as move_masks, get_distances_to_goal() and the reference solver, needs memory for the whole maze.
+    """
+
+    def __init__(self, path, seed=None, winning_position: list = None):
+        """path is the path to a .npy file holding a uint8 grid.
+        seed is only recorded, in case the caller knows the seed the grid was generated from.
+        winning_position is the [r, c] position of the goal, if known.  Otherwise it is found by reading through the
+        grid one band of rows at a time.
+        """
+        grid = np.load(path, mmap_mode="r")
+
+        # Handle errors
+        # grid not a 2D uint8 array
+        if grid.ndim != 2 or grid.dtype != np.uint8:
+            raise ValueError(f"{path} does not hold a 2-dimensional uint8 grid")
+        # grid too small
+        if np.shape(grid)[0] < 2 or np.shape(grid)[1] < 2:
+            raise ValueError("grid must be at least 2x2")
+        # start is not in the bottom-left corner
+        if grid[-1, 0] != 3:
+            raise ValueError("the bottom-left corner of grid must be a 3")
+
+        self.path = path
+        self.seed = seed
+        self.algorithm = None   # Not one of the generators.GENERATORS
+        self._costs = None
+        self._given_winning_position = winning_position
+        self._move_mask_array = None
+        self._set_grid(grid)
+
+        # goal not where it should be
+        if self.grid[self.winning_position[0], self.winning_position[1]] != 2:
+            raise ValueError("grid must contain a 2 at winning_position")
+
+    @property
+    def move_masks(self) -> np.ndarray:
+        """The move masks of the whole maze, as described in Maze._build_move_masks().  They are only computed the
+        first time they're asked for, and need a byte of memory per cell.
+        """
+        if self._move_mask_array is None:
+            Maze._build_move_masks(self)
+        return self._move_mask_array
+
+    @move_masks.setter
+    def move_masks(self, move_masks: np.ndarray) -> None:
+        self._move_mask_array = move_masks
+
+    def _build_move_masks(self) -> None:
+        """Set up the tables used by the move methods, without computing a mask for every cell."""
+        self._move_mask_array = None
+        self._flat_move_masks = _MoveMasksFromGrid(self.grid)
+        flat_offsets = dict(zip(MOVES, get_flat_offsets(self.cols)))
+        self._flat_steps_by_mask = tuple(tuple((flat_offsets[move], move) for move in moves) for moves in MOVES_BY_MASK)
+
+    def _get_winning_position(self) -> list:
+        """Return the given winning position, or else find the first 2 in the grid, a band of rows at a time.  Raises a
+        ValueError if there is none.
+        """
+        if self._given_winning_position is not None:
+            return list(self._given_winning_position)
+        for band_start in range(0, self.rows, DEFAULT_BAND_ROWS):
+            goals = np.flatnonzero(self.grid[band_start:band_start + DEFAULT_BAND_ROWS] == 2)
+            if len(goals) > 0:
+                return [band_start + int(goals[0]) // self.cols, int(goals[0]) % self.cols]
+        raise ValueError("grid must contain a 2")
+
+
+class _MoveMasksFromGrid:
+    """Stands in for the bytes of Maze._flat_move_masks: indexing it with a flat index works out the move mask of that
+    cell from the grid.
+    """
+
+    def __init__(self, grid: np.ndarray):
+        self.grid = grid
+        (self.rows, self.cols) = np.shape(grid)
+
+    def __getitem__(self, index: int) -> int:
+        (r, c) = divmod(index, self.cols)
+        grid = self.grid
+        if grid[r, c] == 1:
+            return 0
+        mask = 0
+        if r > 0 and grid[r - 1, c] != 1:
+            mask |= MOVE_BITS["u"]
+        if r < self.rows - 1 and grid[r + 1, c] != 1:
+            mask |= MOVE_BITS["d"]
+        if c > 0 and grid[r, c - 1] != 1:
+            mask |= MOVE_BITS["l"]
+        if c < self.cols - 1 and grid[r, c + 1] != 1:
+            mask |= MOVE_BITS["r"]
+        return mask
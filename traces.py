@@ -0,0 +1,203 @@
+"""Recording and replay of exactly what a solver did on a maze.
+
+record_trace() runs a solver on an instrumentation.EventMaze with a TraceRecorder listening, and returns a Trace: one
+fixed-width TRACE_DTYPE record per expansion (each call asking for the moves out of a cell), in order, plus the
+solver's final path and the maze itself.  Records are gathered in compact arrays and turned into numpy structured
+arrays a chunk at a time, so recording a million-node search costs about 9 MB, not a million Python objects.
+
+Trace.save() writes a compressed .npz file.  The cell and fringe columns are stored as differences from the previous
+step, which are nearly always tiny in a search and so compress very well.  Trace.load() reads it back with one
+decompression and a cumulative sum.  Trace.state_at(step) rebuilds what the search knew after any step, in one
+vectorized pass over the steps before it.
+"""
+
+
+import array
+import numpy as np
+from instrumentation import EventMaze
+from maze import MOVE_BITS, MOVES, MOVES_BY_MASK, Maze, get_flat_offsets
+
+
+#
+# CONSTANTS
+#
+VERSION = 1
+# One record per expansion: the flat index of the cell expanded, the number of cells in the fringe afterwards (cells
+# next to an expanded cell that haven't been expanded themselves), and how many cells joined the fringe.
+TRACE_DTYPE = np.dtype([("cell", "<u4"), ("fringe", "<u4"), ("new", "u1")])
+DEFAULT_CHUNK_SIZE = 65536  # Records per chunk
+UNSEEN = 0
+FRINGE = 1
+EXPANDED = 2
+
+
+#
+# CLASSES
+#
+class TraceRecorder:
+    """Listener for an instrumentation.EventMaze that records every expansion as a TRACE_DTYPE record."""
+
+    def __init__(self, maze, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """maze is the Maze being searched.
+        chunk_size is the number of records gathered before they are packed into a structured array.
+        """
+        self.chunk_size = chunk_size
+        self._states = bytearray(maze.rows * maze.cols)
+        # The move masks of the maze, and the flat offsets of the cells that each mask leads to
+        self._masks = maze.move_masks.tobytes()
+        offsets = dict(zip(MOVES, get_flat_offsets(maze.cols)))
+        self._offsets_by_mask = tuple(tuple(offsets[move] for move in moves) for moves in MOVES_BY_MASK)
+        self._fringe_size = 0
+        self._chunks = []
+        self._cells = array.array("I")
+        self._fringe_sizes = array.array("I")
+        self._new_counts = array.array("B")
+
+    def __len__(self) -> int:
+        return sum(len(chunk) for chunk in self._chunks) + len(self._cells)
+
+    def expand(self, index: int) -> None:
+        """Record that the cell at flat index index was expanded."""
+        states = self._states
+        if states[index] == FRINGE:
+            self._fringe_size -= 1
+        states[index] = EXPANDED
+        new_count = 0
+        for offset in self._offsets_by_mask[self._masks[index]]:
+            neighbor = index + offset
+            if states[neighbor] == UNSEEN:
+                states[neighbor] = FRINGE
+                new_count += 1
+        self._fringe_size += new_count
+        self._cells.append(index)
+        self._fringe_sizes.append(self._fringe_size)
+        self._new_counts.append(new_count)
+        if len(self._cells) >= self.chunk_size:
+            self._pack_chunk()
+
+    def reach(self, index: int) -> None:
+        """Asking where a single move leads is not an expansion, so it isn't recorded."""
+
+    def get_steps(self) -> np.ndarray:
+        """Return every record so far, as one TRACE_DTYPE array."""
+        self._pack_chunk()
+        if not self._chunks:
+            return np.zeros(0, dtype=TRACE_DTYPE)
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0]
+
+    def _pack_chunk(self) -> None:
+        """Move the records gathered so far into a new structured chunk."""
+        if not self._cells:
+            return
+        chunk = np.empty(len(self._cells), dtype=TRACE_DTYPE)
+        chunk["cell"] = np.frombuffer(self._cells, dtype=np.uint32)
+        chunk["fringe"] = np.frombuffer(self._fringe_sizes, dtype=np.uint32)
+        chunk["new"] = np.frombuffer(self._new_counts, dtype=np.uint8)
+        self._chunks.append(chunk)
+        self._cells = array.array("I")
+        self._fringe_sizes = array.array("I")
+        self._new_counts = array.array("B")
+
+
+class Trace:
+    """Everything a solver did on one maze: the expansions, in order, as self.steps, a TRACE_DTYPE array, and its answer
+    as self.directions.  self.grid is the maze's grid.
+    """
+
+    def __init__(self, grid: np.ndarray, steps: np.ndarray, directions: list):
+        self.grid = np.asarray(grid, dtype=np.uint8)
+        self.steps = steps
+        self.directions = directions
+        (self.rows, self.cols) = np.shape(self.grid)
+        self._move_masks = None
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    @property
+    def expansion_order(self) -> np.ndarray:
+        """Flat indices of the cells expanded, in order."""
+        return self.steps["cell"]
+
+    @property
+    def fringe_sizes(self) -> np.ndarray:
+        """Size of the fringe after each step."""
+        return self.steps["fringe"]
+
+    def get_maze(self) -> Maze:
+        """Return the maze this trace was recorded on."""
+        return Maze.from_grid(self.grid)
+
+    def state_at(self, step: int) -> np.ndarray:
+        """Return a uint8 array shaped like self.grid of what the search knew after its first step steps: EXPANDED for
+        cells it had expanded, FRINGE for cells next to those, and UNSEEN for the rest.  step may be anything from 0
+        to len(self).
+        """
+        # Handle errors
+        # step not int
+        if not isinstance(step, (int, np.integer)):
+            raise TypeError("step must be an int")
+        # step out of bounds
+        if not (0 <= step <= len(self)):
+            raise IndexError("step is out of bounds")
+
+        if self._move_masks is None:
+            self._move_masks = self.get_maze().move_masks.ravel()
+        cells = self.steps["cell"][:step].astype(np.int64)
+        states = np.zeros(self.rows * self.cols, dtype=np.uint8)
+        masks = self._move_masks[cells]
+        for (move, offset) in zip(MOVES, get_flat_offsets(self.cols)):
+            states[cells[(masks & MOVE_BITS[move]) != 0] + offset] = FRINGE
+        states[cells] = EXPANDED
+        return states.reshape(self.rows, self.cols)
+
+    def save(self, path) -> None:
+        """Write this trace to path as a compressed .npz file."""
+        stored = self.steps.copy()
+        # Store each cell and fringe size as its difference from the step before.  uint32 arithmetic wraps around, and
+        # load() wraps back the same way.
+        stored["cell"][1:] = np.diff(self.steps["cell"])
+        stored["fringe"][1:] = np.diff(self.steps["fringe"])
+        directions = np.frombuffer("".join(self.directions).encode("ascii"), dtype=np.uint8)
+        np.savez_compressed(path, version=np.array(VERSION), grid=self.grid, steps=stored, directions=directions)
+
+    @classmethod
+    def load(cls, path):
+        """Read a trace written by save()."""
+        with np.load(path) as data:
+            # Handle errors
+            # not a trace file
+            if "version" not in data or "steps" not in data:
+                raise ValueError(f"{path} is not a trace file")
+            # unsupported version
+            if int(data["version"]) != VERSION:
+                raise ValueError(f"{path} has unsupported trace format version {int(data['version'])}")
+            steps = data["steps"]
+            grid = data["grid"]
+            directions = list(data["directions"].tobytes().decode("ascii"))
+        steps["cell"] = np.cumsum(steps["cell"], dtype=np.uint32)
+        steps["fringe"] = np.cumsum(steps["fringe"], dtype=np.uint32)
+        return cls(grid, steps, directions)
+
+
+#
+# HELPER FUNCTIONS
+#
+def record_trace(solver, maze, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Trace:
+    """Run solver.get_directions on maze, and return a Trace of what it did.  Errors raised by the solver are passed
+    on.
+    solver is a module or object with a get_directions(maze) function, such as example_solution_pathfinder.
+    """
+    # Handle errors
+    # maze not a Maze object
+    if not isinstance(maze, Maze):
+        raise TypeError("maze must be a Maze object")
+    # solver has no get_directions
+    if not callable(getattr(solver, "get_directions", None)):
+        raise TypeError("solver must have a get_directions(maze) function")
+
+    recorder = TraceRecorder(maze, chunk_size)
+    directions = solver.get_directions(EventMaze(maze, recorder))
+    return Trace(maze.grid, recorder.get_steps(), list(directions))
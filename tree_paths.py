@@ -0,0 +1,166 @@
+"""Fast path and distance queries between any two halls of one maze.
+
+The halls reachable from the start are rooted into a tree once, with the depth of every cell and binary-lifting
+ancestor tables.  After that, distance(a, b) takes O(log n) time, by finding the lowest common ancestor of a and b, and
+path(a, b) takes O(log n) plus the length of the path.
+
+In a perfect maze (one with no loops) the tree is the maze itself, so the answers are exact.  Mazes from the Prim's
+generator usually have loops, and then is_exact is False and the tree can't be used: distance() and path() instead run
+a breadth-first search from start, which takes O(n) time, and keep it for the next query from the same start.  The
+answers are shortest ones either way.
+"""
+
+
+import numpy as np
+from maze import MOVE_BITS, MOVES, REVERSE_MOVES, get_flat_offsets
+
+
+#
+# CONSTANTS
+#
+_MOVE_NUMBER_BITS = np.array([MOVE_BITS[move] for move in MOVES], dtype=np.uint8)  # Bit of each move number
+
+
+#
+# CLASSES
+#
+class TreePaths:
+    """Tree of the halls reachable from the start of a maze, prepared for path and distance queries.
+    Usually Maze.get_tree_paths() is used instead of building this directly, since it caches the result.
+    is_exact is whether the tree is the whole reachable maze, so that queries can use it.
+    """
+
+    def __init__(self, maze):
+        self.rows = maze.rows
+        self.cols = maze.cols
+        self.root = (maze.rows - 1) * maze.cols
+        self._masks = maze.move_masks.ravel()
+        self._offsets = np.array(get_flat_offsets(maze.cols))
+        self._searched_from = None  # (source, parents, depths, parent_moves) of the last search for a query
+
+        (self.parents, self.depths, self.parent_moves) = self._search(self.root)
+
+        # Binary lifting: self.ancestors[k][x] is the ancestor 2**k levels above x, or the root if there is none.
+        self.ancestors = [self.parents]
+        while (1 << len(self.ancestors)) <= self.depths.max():
+            self.ancestors.append(self.ancestors[-1][self.ancestors[-1]])
+
+        # The tree is the whole reachable maze if the reachable halls have exactly one fewer connection than halls.
+        is_reached = (self.depths >= 0).reshape(maze.rows, maze.cols)
+        connection_count = (np.count_nonzero(is_reached[1:, :] & is_reached[:-1, :])
+                            + np.count_nonzero(is_reached[:, 1:] & is_reached[:, :-1]))
+        self.is_exact = connection_count == np.count_nonzero(is_reached) - 1
+
+    def distance(self, start: list, goal: list) -> int:
+        """Return the number of moves on a shortest path from start to goal.  start and goal are [r, c] pairs."""
+        a = self._check_position(start, "start")
+        b = self._check_position(goal, "goal")
+        if not self.is_exact:
+            return int(self._search_from(a)[2][b])
+        return int(self.depths[a] + self.depths[b] - 2 * self.depths[self._lowest_common_ancestor(a, b)])
+
+    def path(self, start: list, goal: list) -> list:
+        """Return a shortest list of 'u'/'d'/'l'/'r' directions from start to goal.  start and goal are [r, c] pairs."""
+        a = self._check_position(start, "start")
+        b = self._check_position(goal, "goal")
+        if not self.is_exact:
+            # Walk back from goal to start along the search from start.
+            (_, parents, _, parent_moves) = self._search_from(a)
+            directions = []
+            while b != a:
+                directions.append(MOVES[parent_moves[b]])
+                b = int(parents[b])
+            directions.reverse()
+            return directions
+
+        ancestor = self._lowest_common_ancestor(a, b)
+
+        # Climb from start up to the common ancestor, undoing each move, then come down to goal.
+        climb = []
+        while a != ancestor:
+            climb.append(REVERSE_MOVES[MOVES[self.parent_moves[a]]])
+            a = int(self.parents[a])
+        descent = []
+        while b != ancestor:
+            descent.append(MOVES[self.parent_moves[b]])
+            b = int(self.parents[b])
+        descent.reverse()
+        return climb + descent
+
+    def _search(self, source: int) -> tuple:
+        """Breadth-first search from the flat index source, one whole wavefront at a time.  Returns (parents, depths,
+        parent_moves): each cell's parent, its number of moves from source, and the number of the move that leads from
+        its parent to it.  source is its own parent, and unreached cells have a depth of -1.
+        """
+        cell_count = self.rows * self.cols
+        parents = np.arange(cell_count, dtype=np.int32)
+        depths = np.full(cell_count, -1, dtype=np.int32)
+        parent_moves = np.zeros(cell_count, dtype=np.uint8)
+        wavefront = np.array([source])
+        depths[source] = 0
+        depth = 0
+        while len(wavefront) > 0:
+            depth += 1
+            sources = np.repeat(wavefront, len(MOVES))
+            move_numbers = np.tile(np.arange(len(MOVES)), len(wavefront))
+            is_legal = (self._masks[sources] & _MOVE_NUMBER_BITS[move_numbers]) != 0
+            (sources, move_numbers) = (sources[is_legal], move_numbers[is_legal])
+            targets = sources + self._offsets[move_numbers]
+            is_new = depths[targets] < 0
+            (targets, first) = np.unique(targets[is_new], return_index=True)
+            parents[targets] = sources[is_new][first]
+            parent_moves[targets] = move_numbers[is_new][first]
+            depths[targets] = depth
+            wavefront = targets
+        return parents, depths, parent_moves
+
+    def _search_from(self, source: int) -> tuple:
+        """Return (source, parents, depths, parent_moves) of a search from source, reusing the last one if it was from
+        the same cell.  The search from the root is the tree itself.
+        """
+        if source == self.root:
+            return source, self.parents, self.depths, self.parent_moves
+        if self._searched_from is None or self._searched_from[0] != source:
+            self._searched_from = (source,) + self._search(source)
+        return self._searched_from
+
+    def _lowest_common_ancestor(self, a: int, b: int) -> int:
+        """Return the flat index of the deepest cell that is an ancestor of both a and b."""
+        if self.depths[a] < self.depths[b]:
+            (a, b) = (b, a)
+        # Lift a to the depth of b.
+        difference = int(self.depths[a] - self.depths[b])
+        level = 0
+        while difference:
+            if difference & 1:
+                a = int(self.ancestors[level][a])
+            difference >>= 1
+            level += 1
+        if a == b:
+            return a
+        # Lift both as far as possible while they stay apart; their parent is then the common ancestor.
+        for level in range(len(self.ancestors) - 1, -1, -1):
+            if self.ancestors[level][a] != self.ancestors[level][b]:
+                a = int(self.ancestors[level][a])
+                b = int(self.ancestors[level][b])
+        return int(self.parents[a])
+
+    def _check_position(self, position: list, name: str) -> int:
+        """Raise an error if position is not an [r, c] pair of a hall reachable from the start.  Else return its flat
+        index.
+        """
+        # position not a list or tuple of 2 elements
+        if not isinstance(position, (list, tuple)) or len(position) != 2:
+            raise TypeError(f"{name} must be a list of 2 integers: [row, column]")
+        (r, c) = position
+        # position contains a non-integer element
+        if not isinstance(r, int) or not isinstance(c, int):
+            raise TypeError(f"all elements of {name} must be ints")
+        # position out of bounds
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            raise IndexError(f"{name} is out of bounds")
+        index = r * self.cols + c
+        # position is a wall or unreachable
+        if self.depths[index] < 0:
+            raise ValueError(f"{name} is a wall, or can't be reached from the start")
+        return index
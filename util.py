@@ -1,37 +1,109 @@
 """Other helpful classes and functions for the student to use."""
 
 
+import heapq
+import itertools
+import math
+import numbers
+
+
 class MinPriorityQueue:
-    """Minimum-priority-first priority queue.  Not a computationally efficient implementation, but totally fine for
-    this project.
+    """Minimum-priority-first priority queue, backed by a binary heap.  enqueue() and dequeue() are O(log n).
+    Data elements that are hashable can also be looked up with contains() and re-prioritized with decrease_key().
     """
 
+    _REMOVED = object()     # Placeholder for the data of an entry that was superseded by decrease_key()
+
     def __init__(self):
-        self.queue = []  # Element 0 is the front of the queue
+        self.queue = []  # Heap of [priority, insertion_number, data] entries.  Element 0 is the front of the queue
+        self._counter = itertools.count()   # Insertion numbers, used to break ties in FIFO order
+        self._entries = {}  # Maps each hashable data element to the list of its live entries in self.queue
+        self._size = 0      # Number of live entries in self.queue
 
-    def enqueue(self, data, priority: int) -> None:
+    def __len__(self) -> int:
+        """Return the number of data elements in the queue."""
+        return self._size
+
+    def enqueue(self, data, priority: float) -> None:
         """Place some data into the queue with a given priority"""
         # Handle errors
         # priority not an int or float
-        if not isinstance(priority, int):
+        if not isinstance(priority, numbers.Real):
             raise TypeError("priority must be an integer or float")
+        # priority is NaN
+        if math.isnan(priority):
+            raise ValueError("priority must not be NaN")
 
-        self.queue.append([data, priority])
+        entry = [priority, next(self._counter), data]
+        heapq.heappush(self.queue, entry)
+        self._size += 1
+        try:
+            self._entries.setdefault(data, []).append(entry)
+        except TypeError:   # Unhashable data can still be queued, but not looked up.
+            pass
 
     def dequeue(self):
         """Return the data element with lowest priority, and remove it from the queue.  In case of ties, the data element earliest in the queue is
         chosen."""
         # Handle errors
         # queue empty
-        if len(self.queue) == 0:
+        if self._size == 0:
             raise RuntimeError("Cannot dequeue from an empty queue")
 
-        lowest_priority = float("inf")
-        lowest_priority_position = None
-        for ii in range(len(self.queue)):
-            this_priority = self.queue[ii][1]
-            if this_priority < lowest_priority:
-                lowest_priority_position = ii
-                lowest_priority = this_priority
-        removed_element = self.queue.pop(lowest_priority_position)
-        return removed_element[0]
+        while True:
+            priority, insertion_number, data = heapq.heappop(self.queue)
+            if data is not self._REMOVED:
+                break
+        self._size -= 1
+        self._forget_entry(data, insertion_number)
+        return data
+
+    def contains(self, data) -> bool:
+        """Return whether data is currently in the queue.  data must be hashable."""
+        return data in self._entries
+
+    def decrease_key(self, data, priority: float) -> None:
+        """Lower the priority of data, which must already be in the queue.  data keeps its original place in the queue
+        for the purpose of breaking ties.  If data was enqueued more than once, the copy that would be dequeued first is
+        updated.  A priority equal to the current one leaves the queue unchanged.
+        """
+        # Handle errors
+        # priority not an int or float
+        if not isinstance(priority, numbers.Real):
+            raise TypeError("priority must be an integer or float")
+        # priority is NaN
+        if math.isnan(priority):
+            raise ValueError("priority must not be NaN")
+        # data not in the queue
+        if data not in self._entries:
+            raise KeyError("data is not in the queue")
+        old_entry = min(self._entries[data])
+        # priority is not lower
+        if priority > old_entry[0]:
+            raise ValueError("priority must not be greater than the current priority of data")
+        # An equal priority changes nothing.  A replacement would tie with the old entry on both priority and
+        # insertion number, and heapq would go on to compare data with the placeholder.
+        if priority == old_entry[0]:
+            return
+
+        # Leave the old entry in the heap as a placeholder, and push a replacement with the same insertion number.
+        new_entry = [priority, old_entry[1], data]
+        old_entry[2] = self._REMOVED
+        entries = self._entries[data]
+        entries[entries.index(old_entry)] = new_entry
+        heapq.heappush(self.queue, new_entry)
+
+    def _forget_entry(self, data, insertion_number: int) -> None:
+        """Remove the entry for data with the given insertion number from self._entries, if data is hashable."""
+        try:
+            entries = self._entries.get(data)
+        except TypeError:
+            return
+        if entries is None:
+            return
+        for ii in range(len(entries)):
+            if entries[ii][1] == insertion_number:
+                del entries[ii]
+                break
+        if len(entries) == 0:
+            del self._entries[data]
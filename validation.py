@@ -0,0 +1,136 @@
+"""Programmatic checking and scoring of direction lists, without drawing them.
+A direction list is valid if every step stays inside the maze and off the walls, and the last step ends on the goal.
+"""
+
+
+import numpy as np
+
+
+#
+# CONSTANTS
+#
+# Change in (row, column) for each direction, indexed by the direction's code in _encode_directions().
+_STEP_DELTAS = np.array([[0, 0], [-1, 0], [1, 0], [0, -1], [0, 1]], dtype=np.int64)
+_INVALID_CODE = 0   # Code of anything that is not 'u', 'd', 'l', or 'r'
+_CODES_BY_BYTE = np.zeros(256, dtype=np.uint8)
+_CODES_BY_BYTE[[ord("u"), ord("d"), ord("l"), ord("r")]] = [1, 2, 3, 4]
+
+
+#
+# HELPER FUNCTIONS
+#
+def score_directions(maze, directions, optimal_length: int = None) -> dict:
+    """Check directions against maze, and return a dict with these keys:
+    "valid" is whether every step is legal and the path ends on the goal.
+    "reached_goal" is whether the path ends on the goal, even if it took an illegal step on the way.
+    "first_illegal_step" is the index in directions of the first step that leaves the maze, lands on a wall, or is not
+    'u', 'd', 'l', or 'r', or None if there is no such step.
+    "path_length" is len(directions).
+    "optimal_length" is the length of a shortest path through maze.
+    "optimality" is optimal_length / path_length for valid paths, so 1.0 is a shortest path, and 0.0 otherwise.
+    "error" is a message if directions is not a list, or else None.
+    optimal_length defaults to maze.optimal_length().
+    """
+    optimal_lengths = None if optimal_length is None else [optimal_length]
+    return score_batch([maze], [[directions]], optimal_lengths)[0][0]
+
+
+def score_batch(mazes: list, submissions: list, optimal_lengths: list = None) -> list:
+    """Score many direction lists against many mazes in one vectorized pass.
+    submissions[i] is a list of direction lists to check against mazes[i].  Returns a list of lists of the same shape,
+    holding the dicts described in score_directions().
+    optimal_lengths[i], if given, is the length of a shortest path through mazes[i].
+    """
+    # Handle errors
+    # mazes and submissions of different lengths
+    if len(mazes) != len(submissions):
+        raise ValueError("mazes and submissions must have the same length")
+    # optimal_lengths of the wrong length
+    if optimal_lengths is not None and len(optimal_lengths) != len(mazes):
+        raise ValueError("optimal_lengths must have the same length as mazes")
+
+    if optimal_lengths is None:
+        optimal_lengths = [maze.optimal_length() for maze in mazes]
+
+    # Lay all the grids end to end, so that every cell of every maze has one flat index.
+    grid_rows = np.array([np.shape(maze.grid)[0] for maze in mazes], dtype=np.int64)
+    grid_cols = np.array([np.shape(maze.grid)[1] for maze in mazes], dtype=np.int64)
+    grid_bases = np.concatenate([[0], np.cumsum(grid_rows * grid_cols)[:-1]]).astype(np.int64)
+    all_cells = np.concatenate([np.ravel(maze.grid) for maze in mazes]) if mazes else np.zeros(0, dtype=np.uint8)
+
+    # Flatten the submissions into one array of step codes, remembering which submission each step belongs to.
+    submission_mazes = []   # Index of the maze of each submission
+    submission_codes = []   # Step codes of each submission
+    submission_errors = []  # Error message of each submission, or None
+    for (maze_index, maze_submissions) in enumerate(submissions):
+        for directions in maze_submissions:
+            submission_mazes.append(maze_index)
+            if isinstance(directions, list):
+                submission_codes.append(_encode_directions(directions))
+                submission_errors.append(None)
+            else:
+                submission_codes.append(np.zeros(0, dtype=np.uint8))
+                submission_errors.append("directions must be a list")
+    submission_count = len(submission_codes)
+    submission_mazes = np.array(submission_mazes, dtype=np.int64)
+    lengths = np.array([len(codes) for codes in submission_codes], dtype=np.int64)
+    codes = np.concatenate(submission_codes) if submission_codes else np.zeros(0, dtype=np.uint8)
+    step_submissions = np.repeat(np.arange(submission_count), lengths)
+    step_numbers = np.arange(len(codes)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    # Follow every path at once: a running sum of the steps, reset at the start of each submission.
+    running = np.cumsum(_STEP_DELTAS[codes], axis=0)
+    before_each = np.concatenate([np.zeros((1, 2), dtype=np.int64), running])[np.cumsum(lengths) - lengths]
+    step_mazes = submission_mazes[step_submissions]
+    positions = running - before_each[step_submissions]
+    positions[:, 0] += grid_rows[step_mazes] - 1     # Every path starts in the bottom-left corner.
+
+    # Find the illegal steps.
+    is_inside = ((positions[:, 0] >= 0) & (positions[:, 0] < grid_rows[step_mazes])
+                 & (positions[:, 1] >= 0) & (positions[:, 1] < grid_cols[step_mazes]))
+    flat_positions = np.where(is_inside, grid_bases[step_mazes] + positions[:, 0] * grid_cols[step_mazes] + positions[:, 1], 0)
+    cells = all_cells[flat_positions]
+    is_illegal = (codes == _INVALID_CODE) | ~is_inside | (cells == 1)
+    first_illegal_steps = np.full(submission_count, -1, dtype=np.int64)
+    illegal_steps = np.flatnonzero(is_illegal)[::-1]    # Reversed, so that the first illegal step is assigned last
+    first_illegal_steps[step_submissions[illegal_steps]] = step_numbers[illegal_steps]
+
+    # Find which paths end on the goal.  Empty paths end on the start, which is never the goal.
+    last_steps = np.cumsum(lengths) - 1
+    ends_on_goal = np.zeros(submission_count, dtype=np.bool_)
+    has_steps = lengths > 0
+    ends_on_goal[has_steps] = is_inside[last_steps[has_steps]] & (cells[last_steps[has_steps]] == 2)
+
+    # Build the results.
+    results = [[] for _ in mazes]
+    for ii in range(submission_count):
+        maze_index = int(submission_mazes[ii])
+        first_illegal_step = int(first_illegal_steps[ii]) if first_illegal_steps[ii] >= 0 else None
+        reached_goal = bool(ends_on_goal[ii])
+        is_valid = reached_goal and first_illegal_step is None and submission_errors[ii] is None
+        path_length = int(lengths[ii])
+        results[maze_index].append({
+            "valid": is_valid,
+            "reached_goal": reached_goal,
+            "first_illegal_step": first_illegal_step,
+            "path_length": path_length,
+            "optimal_length": optimal_lengths[maze_index],
+            "optimality": optimal_lengths[maze_index] / path_length if is_valid else 0.0,
+            "error": submission_errors[ii],
+        })
+    return results
+
+
+def _encode_directions(directions: list) -> np.ndarray:
+    """Return a uint8 array of the step codes of directions.  Elements that are not 'u', 'd', 'l', or 'r' get
+    _INVALID_CODE.
+    """
+    try:
+        joined = "".join(directions).encode("ascii")
+    except (TypeError, UnicodeEncodeError):
+        joined = None
+    if joined is not None and len(joined) == len(directions):
+        return _CODES_BY_BYTE[np.frombuffer(joined, dtype=np.uint8)]
+    # Slow path, for lists containing something other than single-character strings
+    return np.array([_CODES_BY_BYTE[ord(step)] if isinstance(step, str) and len(step) == 1 and ord(step) < 256 else _INVALID_CODE
+                     for step in directions], dtype=np.uint8)
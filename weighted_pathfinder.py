@@ -0,0 +1,143 @@
+"""Cheapest paths through mazes with terrain, where moving into each cell costs maze.costs at that cell.
+
+get_directions() is an A* search whose fringe is a bucket queue (Dial's algorithm) instead of a comparison heap.  With
+costs that are small integers, every f value that can be in the fringe at once lies in a window of at most
+2 * max_cost + 1 values, so a ring of that many lists holds the fringe, and pushing and popping each take O(1) time.
+The whole search then runs in time linear in the cells it expands plus the cost of the path it finds.
+get_directions_dijkstra() is a plain Dijkstra search on a binary heap, kept as the reference that the fast solver is
+checked against.
+
+Mazes without terrain (maze.costs is None) are searched as if every move cost 1.
+"""
+
+
+import heapq
+import numpy as np
+from maze import MOVES, MOVES_BY_MASK, get_flat_offsets
+
+
+#
+# HELPER FUNCTIONS
+#
+def get_directions(maze) -> list:
+    """Given a Maze object, return a list of directions from the bottom-left corner (marked 3) to the exit (marked 2)
+    whose total cost is as low as possible, using A* with a bucket queue.  Each element of the list returned is "u",
+    "d", "l", or "r".  Raises a RuntimeError if the exit can't be reached.
+
+    The heuristic is the Manhattan distance to the goal times the lowest cost of any cell, so it never overestimates,
+    and it changes by at most that lowest cost per move, so f never goes down along a path.
+    """
+    (rows, cols, start, goal, costs, steps_by_mask, masks) = _prepare(maze)
+    (goal_r, goal_c) = divmod(goal, cols)
+    cheapest = min(costs) if costs else 1
+    ring_size = max(costs, default=1) + cheapest + 1     # More than the most f can grow in one move
+    # The heuristic of every cell, worked out once with numpy.  memoryviews give fast scalar reads from its buffer.
+    h_array = (np.abs(np.arange(rows) - goal_r)[:, np.newaxis] + np.abs(np.arange(cols) - goal_c)) * cheapest
+    h = memoryview(h_array.astype(np.int64).ravel())
+
+    closed = bytearray(rows * cols)
+    g = [-1] * (rows * cols)    # Best known cost of each cell, or -1 if not reached yet
+    parent_move = bytearray(rows * cols)    # Move number used to reach each cell
+
+    # buckets[f % ring_size] holds the cells last pushed with that f.  Cells whose g has improved since they were
+    # pushed stay in their old bucket, and are skipped when they come up, since by then they are closed.
+    buckets = [[] for _ in range(ring_size)]
+    f = h[start]
+    buckets[f % ring_size].append(start)
+    g[start] = 0
+    fringe_size = 1
+
+    # Run A*
+    while fringe_size:
+        bucket = buckets[f % ring_size]
+        # Cells pushed with the same f while this bucket is being emptied land in it too, and are taken next.
+        while bucket:
+            index = bucket.pop()
+            fringe_size -= 1
+            if closed[index]:
+                continue
+            if index == goal:
+                return _rebuild_path(start, goal, parent_move, cols)
+            closed[index] = 1
+            g_index = g[index]
+            for (offset, move_number) in steps_by_mask[masks[index]]:
+                neighbor = index + offset
+                new_g = g_index + costs[neighbor]
+                if 0 <= g[neighbor] <= new_g:   # Includes every closed cell, since their costs are already lowest
+                    continue
+                g[neighbor] = new_g
+                parent_move[neighbor] = move_number
+                buckets[(new_g + h[neighbor]) % ring_size].append(neighbor)
+                fringe_size += 1
+        f += 1
+    raise RuntimeError("There is no path from the start to the goal")
+
+
+def get_directions_dijkstra(maze) -> list:
+    """Return a cheapest list of directions from the start to the goal of maze, like get_directions(), using Dijkstra's
+    algorithm on a binary heap.  This is slower, and is meant as a reference to check faster solvers against.
+    """
+    (rows, cols, start, goal, costs, steps_by_mask, masks) = _prepare(maze)
+    closed = bytearray(rows * cols)
+    g = [-1] * (rows * cols)
+    parent_move = bytearray(rows * cols)
+
+    g[start] = 0
+    fringe = [(0, start)]
+    while fringe:
+        (g_index, index) = heapq.heappop(fringe)
+        if closed[index]:
+            continue
+        if index == goal:
+            return _rebuild_path(start, goal, parent_move, cols)
+        closed[index] = 1
+        for (offset, move_number) in steps_by_mask[masks[index]]:
+            neighbor = index + offset
+            new_g = g_index + costs[neighbor]
+            if closed[neighbor] or 0 <= g[neighbor] <= new_g:
+                continue
+            g[neighbor] = new_g
+            parent_move[neighbor] = move_number
+            heapq.heappush(fringe, (new_g, neighbor))
+    raise RuntimeError("There is no path from the start to the goal")
+
+
+def get_path_cost(maze, directions: list) -> int:
+    """Return the total cost of following directions from the start of maze: the sum of the costs of the cells moved
+    into.  directions must be a legal path, such as one returned by a solver.
+    """
+    moves = np.array([MOVES.index(direction) for direction in directions], dtype=np.int64)
+    (rows, cols) = np.shape(maze.grid)
+    steps = np.array(get_flat_offsets(cols), dtype=np.int64)[moves]
+    cells = (rows - 1) * cols + np.cumsum(steps)
+    if maze.costs is None:
+        return len(cells)
+    return int(maze.costs.ravel()[cells].sum(dtype=np.int64))
+
+
+def _prepare(maze) -> tuple:
+    """Return what the solvers need from maze: (rows, cols, start, goal, costs, steps_by_mask, masks).  costs is a
+    bytes object of the cost of each cell, by flat index, or all 1s if maze.costs is None.  steps_by_mask lists the
+    (flat index offset, move number) pairs of the legal moves of each 4-bit move mask, and masks is the bytes of
+    maze.move_masks.  Indexing bytes gives plain ints, which is much faster than indexing numpy arrays.
+    """
+    (rows, cols) = np.shape(maze.grid)
+    start = (rows - 1) * cols
+    goal = maze.winning_position[0] * cols + maze.winning_position[1]
+    costs = bytes([1]) * (rows * cols) if maze.costs is None else maze.costs.tobytes()
+    offsets = get_flat_offsets(cols)
+    steps_by_mask = [[(offsets[MOVES.index(move)], MOVES.index(move)) for move in moves] for moves in MOVES_BY_MASK]
+    return rows, cols, start, goal, costs, steps_by_mask, maze.move_masks.tobytes()
+
+
+def _rebuild_path(start: int, goal: int, parent_move: bytearray, cols: int) -> list:
+    """Walk the parent moves back from goal to start, and return the moves in order."""
+    offsets = get_flat_offsets(cols)
+    directions = []
+    index = goal
+    while index != start:
+        move_number = parent_move[index]
+        directions.append(MOVES[move_number])
+        index -= offsets[move_number]
+    directions.reverse()
+    return directions